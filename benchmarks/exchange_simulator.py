@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import websockets
+
+from benchmarks.synthetic_chain import SECONDS_PER_YEAR, make_instruments, make_orderbook_message, make_ticker
+
+"""
+A local stand-in for Lyra's websocket API, for load and soak testing the monitor without the live exchange.
+
+It serves public/get_instruments and public/get_ticker for synthetic chains and pushes random-walk orderbooks
+on the orderbook channels that are subscribed, at a fixed total message rate. Ticker channels are pushed once a second.
+Latency can be added to every message it sends, and connections can be dropped on an interval. Run from the repository root:
+    PYTHONPATH=src python -m benchmarks.exchange_simulator --strikes 100 --expiries 4 --rate 5000
+then point the monitor at it with --ws_uri ws://127.0.0.1:8765.
+Every report it logs how far its sends are running behind, which grows once the monitor can't keep up with the rate.
+"""
+
+logger = logging.getLogger(__name__)
+
+FORWARD_PRICES = {"BTC": 60000.0, "ETH": 3000.0}
+# the depths and groupings Lyra offers for orderbook channels
+ORDERBOOK_DEPTHS = (1, 10, 20, 100)
+ORDERBOOK_GROUPS = (1, 10, 100)
+
+
+class _Connection:
+    """
+    One client connection. Everything sent to it goes through a queue so latency can be added without reordering messages.
+    """
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.channels: set = set()
+        self.outgoing: asyncio.Queue = asyncio.Queue()
+        self.worst_send_lag = 0.0
+        self.sender_task: asyncio.Task | None = None
+
+    def send(self, message: str, latency_seconds: float):
+        self.outgoing.put_nowait((time.monotonic() + latency_seconds, message))
+
+    async def run_sender(self):
+        while True:
+            due_at, message = await self.outgoing.get()
+            delay = due_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # send waits while the client's receive buffer is full, so a client that falls behind shows up as lag here
+            await self.websocket.send(message)
+            self.worst_send_lag = max(self.worst_send_lag, time.monotonic() - due_at)
+
+
+class ExchangeSimulator:
+    """
+    Serves synthetic chains for the given currencies, expiry_count weekly expiries each with strike_count strikes of calls and puts.
+    message_rate is the total number of orderbook pushes per second spread at random over every subscribed orderbook channel.
+    Every message is delayed by latency_seconds plus up to latency_jitter_seconds, and a random connection is closed
+    every disconnect_interval_seconds when it is given.
+    """
+    def __init__(self, currencies: List[str], strike_count: int, expiry_count: int, levels: int = 100, message_rate: float = 1000.0, latency_seconds: float = 0.0,
+                 latency_jitter_seconds: float = 0.0, disconnect_interval_seconds: float | None = None, volatility: float = 0.8, seed: int = 0):
+        self._rng = np.random.default_rng(seed)
+        self._levels = levels
+        self._message_rate = message_rate
+        self._latency_seconds = latency_seconds
+        self._latency_jitter_seconds = latency_jitter_seconds
+        self._disconnect_interval_seconds = disconnect_interval_seconds
+        self._volatility = volatility
+        self._forward_prices = {currency: FORWARD_PRICES.get(currency, 1000.0) for currency in currencies}
+        self._instruments: Dict[str, List[Dict]] = {currency: [] for currency in currencies}
+        for expiry_date, expiry_seconds in _weekly_expiries(expiry_count):
+            for currency in currencies:
+                self._instruments[currency].extend(make_instruments(strike_count, expiry_seconds, self._forward_prices[currency], currency, expiry_date))
+        self._instruments_by_name = {instrument["instrument_name"]: instrument for instruments in self._instruments.values() for instrument in instruments}
+        self._connections: List[_Connection] = []
+        # (connection, channel, instrument, depth) for every subscribed orderbook channel, rebuilt when subscriptions change
+        self._orderbook_channels: List[Tuple[_Connection, str, Dict, int]] = []
+        self._orderbook_channels_changed = False
+        self._server = None
+        self._tasks: List[asyncio.Task] = []
+        self._orderbook_pushes = 0
+        self._disconnects = 0
+
+    @property
+    def uri(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    @property
+    def instrument_count(self) -> int:
+        return len(self._instruments_by_name)
+
+    @property
+    def orderbook_pushes(self) -> int:
+        return self._orderbook_pushes
+
+    @property
+    def disconnects(self) -> int:
+        return self._disconnects
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Starts serving on host:port, any free port when port is 0.
+        """
+        self._server = await websockets.serve(self._handle, host, port, max_size=None)
+        self._tasks.append(asyncio.create_task(self._publish_orderbooks()))
+        self._tasks.append(asyncio.create_task(self._publish_tickers()))
+        if self._disconnect_interval_seconds:
+            self._tasks.append(asyncio.create_task(self._disconnect_periodically()))
+        logger.info(f"Simulating {self.instrument_count} instruments on {self.uri} at {self._message_rate} orderbook pushes per second")
+
+    async def close(self):
+        """
+        Stops publishing, closes every open connection and waits for all of its tasks to finish.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        connections = list(self._connections)
+        for connection in connections:
+            connection.sender_task.cancel()
+        await asyncio.gather(*(connection.sender_task for connection in connections), return_exceptions=True)
+        await asyncio.gather(*(connection.websocket.close() for connection in connections), return_exceptions=True)
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def report_periodically(self, interval_seconds: float):
+        """
+        Logs the push rate achieved, the messages waiting to be sent and the worst send lag since the last report.
+        """
+        last_pushes, last_reported_at = self._orderbook_pushes, time.monotonic()
+        while True:
+            await asyncio.sleep(interval_seconds)
+            now = time.monotonic()
+            backlog = sum(connection.outgoing.qsize() for connection in self._connections)
+            worst_send_lag = max((connection.worst_send_lag for connection in self._connections), default=0.0)
+            for connection in self._connections:
+                connection.worst_send_lag = 0.0
+            logger.info(f"Sent {round((self._orderbook_pushes - last_pushes) / (now - last_reported_at))} orderbook pushes per second on {len(self._orderbook_channels)} channels "
+                        f"over {len(self._connections)} connections, {backlog} messages waiting, worst send lag {round(worst_send_lag, 3)} seconds, {self._disconnects} disconnects")
+            last_pushes, last_reported_at = self._orderbook_pushes, now
+
+    async def _handle(self, websocket):
+        connection = _Connection(websocket)
+        self._connections.append(connection)
+        connection.sender_task = asyncio.create_task(connection.run_sender())
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                connection.send(json.dumps(self._reply(connection, request)), self._latency())
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            connection.sender_task.cancel()
+            self._connections.remove(connection)
+            self._orderbook_channels_changed = True
+
+    def _reply(self, connection: _Connection, request: Dict) -> Dict:
+        method, params = request.get("method"), request.get("params", {})
+        if method == "public/get_instruments":
+            return {"id": request["id"], "result": self._instruments.get(params.get("currency"), [])}
+        if method == "public/get_ticker":
+            instrument = self._instruments_by_name.get(params.get("instrument_name"))
+            if instrument is None:
+                return {"id": request["id"], "error": {"code": -32602, "message": f"Unknown instrument {params.get('instrument_name')}"}}
+            return {"id": request["id"], "result": {"instrument_name": instrument["instrument_name"], **self._ticker(instrument)}}
+        if method == "subscribe":
+            status = {channel: self._channel_status(channel) for channel in params.get("channels", [])}
+            connection.channels.update(channel for channel, channel_status in status.items() if channel_status == "ok")
+            self._orderbook_channels_changed = True
+            return {"id": request["id"], "result": {"status": status, "current_subscriptions": sorted(connection.channels)}}
+        if method == "unsubscribe":
+            connection.channels.difference_update(params.get("channels", []))
+            self._orderbook_channels_changed = True
+            return {"id": request["id"], "result": {"status": {channel: "ok" for channel in params.get("channels", [])}, "remaining_subscriptions": sorted(connection.channels)}}
+        return {"id": request.get("id"), "error": {"code": -32601, "message": f"Method {method} not found"}}
+
+    def _channel_status(self, channel: str) -> str:
+        # channels look like orderbook.{instrument_name}.{group}.{depth} and ticker.{instrument_name}.{interval}
+        parts = channel.split(".")
+        if len(parts) < 2 or parts[1] not in self._instruments_by_name:
+            return "invalid_channel"
+        if parts[0] == "orderbook" and len(parts) == 4 and parts[2].isdigit() and parts[3].isdigit() \
+                and int(parts[2]) in ORDERBOOK_GROUPS and int(parts[3]) in ORDERBOOK_DEPTHS:
+            return "ok"
+        if parts[0] == "ticker" and len(parts) == 3:
+            return "ok"
+        return "invalid_channel"
+
+    def _ticker(self, instrument: Dict) -> Dict:
+        return make_ticker(instrument, self._forward_price(instrument), self._tau(instrument))
+
+    def _forward_price(self, instrument: Dict) -> float:
+        # instrument names look like ETH-20240329-3000-C
+        return self._forward_prices[instrument["instrument_name"].split("-")[0]]
+
+    @staticmethod
+    def _tau(instrument: Dict) -> float:
+        return max(instrument["option_details"]["expiry"] - time.time(), 60) / SECONDS_PER_YEAR
+
+    def _latency(self) -> float:
+        return self._latency_seconds + (self._rng.uniform(0, self._latency_jitter_seconds) if self._latency_jitter_seconds else 0.0)
+
+    def _walk_forward_prices(self, elapsed_seconds: float):
+        for currency, forward_price in self._forward_prices.items():
+            self._forward_prices[currency] = forward_price * np.exp(self._volatility * np.sqrt(elapsed_seconds / SECONDS_PER_YEAR) * self._rng.normal())
+
+    async def _publish_orderbooks(self, tick_seconds: float = 0.01):
+        """
+        Every tick walks the forwards and pushes the books due at message_rate, each for a random subscribed orderbook channel.
+        """
+        owed_pushes = 0.0
+        last_tick_at = time.monotonic()
+        while True:
+            await asyncio.sleep(tick_seconds)
+            now = time.monotonic()
+            self._walk_forward_prices(now - last_tick_at)
+            owed_pushes += self._message_rate * (now - last_tick_at)
+            last_tick_at = now
+            if self._orderbook_channels_changed:
+                self._orderbook_channels = [(connection, channel, self._instruments_by_name[channel.split(".")[1]], int(channel.split(".")[3]))
+                                            for connection in self._connections for channel in connection.channels if channel.startswith("orderbook.")]
+                self._orderbook_channels_changed = False
+            if not self._orderbook_channels:
+                owed_pushes = 0.0
+                continue
+            push_count = int(owed_pushes)
+            owed_pushes -= push_count
+            timestamp = int(time.time() * 1000)
+            for position in self._rng.integers(len(self._orderbook_channels), size=push_count):
+                connection, channel, instrument, depth = self._orderbook_channels[position]
+                message = make_orderbook_message(instrument, self._forward_price(instrument), self._tau(instrument), min(depth, self._levels), timestamp, self._rng)
+                message["params"]["channel"] = channel
+                connection.send(json.dumps(message), self._latency())
+            self._orderbook_pushes += push_count
+
+    async def _publish_tickers(self):
+        while True:
+            await asyncio.sleep(1)
+            for connection in self._connections:
+                for channel in connection.channels:
+                    if channel.startswith("ticker."):
+                        ticker = {"instrument_ticker": self._ticker(self._instruments_by_name[channel.split(".")[1]]), "timestamp": int(time.time() * 1000)}
+                        connection.send(json.dumps({"method": "subscription", "params": {"channel": channel, "data": ticker}}), self._latency())
+
+    async def _disconnect_periodically(self):
+        while True:
+            await asyncio.sleep(self._disconnect_interval_seconds)
+            if self._connections:
+                connection = self._connections[self._rng.integers(len(self._connections))]
+                logger.info(f"Dropping a connection with {len(connection.channels)} channels")
+                self._disconnects += 1
+                await connection.websocket.close(code=1012, reason="simulated disconnect")
+
+
+def _weekly_expiries(expiry_count: int) -> List[Tuple[str, int]]:
+    """
+    Returns the date and timestamp of the next expiry_count Friday 08:00 UTC expiries, the way Lyra lists them.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    friday = (now + datetime.timedelta(days=(4 - now.weekday()) % 7)).replace(hour=8, minute=0, second=0, microsecond=0)
+    if friday <= now:
+        friday += datetime.timedelta(days=7)
+    expiries = [friday + datetime.timedelta(weeks=week) for week in range(expiry_count)]
+    return [(expiry.strftime("%Y%m%d"), int(expiry.timestamp())) for expiry in expiries]
+
+
+async def _serve(arguments):
+    simulator = ExchangeSimulator(arguments.currency, arguments.strikes, arguments.expiries, arguments.levels, arguments.rate, arguments.latency_ms / 1000,
+                                  arguments.latency_jitter_ms / 1000, arguments.disconnect_interval or None, seed=arguments.seed)
+    await simulator.start(arguments.host, arguments.port)
+    try:
+        await simulator.report_periodically(arguments.report_seconds)
+    finally:
+        await simulator.close()
+
+
+def main():
+    logging.basicConfig(format="%(asctime)s,%(msecs)03d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s", datefmt="%Y-%m-%d:%H:%M:%S", level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Serve a simulated Lyra websocket API with synthetic option chains")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="The host to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="The port to listen on")
+    parser.add_argument("--currency", type=str, nargs="+", default=["ETH"], help="The currencies to list options for")
+    parser.add_argument("--strikes", type=int, default=50, help="The number of strikes per expiry, each with a call and a put")
+    parser.add_argument("--expiries", type=int, default=2, help="The number of weekly expiries per currency")
+    parser.add_argument("--levels", type=int, default=100, help="The most price levels on each side of a book, capped by the subscribed channel depth")
+    parser.add_argument("--rate", type=float, default=1000, help="The total number of orderbook pushes per second across every subscribed channel")
+    parser.add_argument("--latency_ms", type=float, default=0, help="Latency added to every message sent")
+    parser.add_argument("--latency_jitter_ms", type=float, default=0, help="Up to this much random latency on top of --latency_ms")
+    parser.add_argument("--disconnect_interval", type=float, default=0, help="Drop a random connection every this many seconds, never if 0")
+    parser.add_argument("--report_seconds", type=float, default=10, help="The number of seconds between reports of the send rate and lag")
+    parser.add_argument("--seed", type=int, default=0, help="The seed for the random walks and volumes")
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import json
+from typing import Callable, Dict, List, Tuple
+
+from lyra.push_decoder import push_channel
+
+
+class InMemoryConnection:
+    """
+    Stands in for the connection pool in benchmarks. Tickers are served from a dict and the benchmark pushes orderbook messages itself.
+    """
+    def __init__(self, tickers: Dict[str, Dict]):
+        self._tickers = tickers
+        self._channel_handlers: Dict[str, Tuple[Callable[[Dict | str, int], None], bool]] = {}
+
+    async def call(self, method: str, params: Dict, timeout_seconds: float | None = None) -> Dict:
+        return {"result": self._tickers[params["instrument_name"]]}
+
+    async def call_many(self, method: str, params_list: List[Dict]) -> List[Dict]:
+        return [await self.call(method, params) for params in params_list]
+
+    async def subscribe(self, channels: List[str], handler: Callable[[Dict | str, int], None], raw: bool = False):
+        for channel in channels:
+            self._channel_handlers[channel] = handler, raw
+
+    async def unsubscribe(self, channels: List[str]):
+        for channel in channels:
+            self._channel_handlers.pop(channel, None)
+
+    def push(self, message: str):
+        """
+        Hands a serialized push to its channel's handler the way RpcClient would.
+        """
+        handler, raw = self._channel_handlers[push_channel(message)]
+        handler(message if raw else json.loads(message), len(message))
@@ -0,0 +1,57 @@
+import argparse
+import time
+
+import numba
+import numpy as np
+
+from benchmarks.run_benchmarks import FORWARD_PRICE, TAU, measure
+from benchmarks.synthetic_chain import SECONDS_PER_YEAR, make_instruments, make_orderbook_message
+from lyra.instrument_table import InstrumentTable
+from lyra.order_book_store import OrderBookStore
+from utils import black76, parallel_evaluation
+
+"""
+Measures how the parallel evaluation kernel scales with numba threads on a synthetic chain, 500 instruments by default.
+Every pass evaluates every book from cold IV guesses, so the numbers are the worst case for a burst of updates. Run from the repository root:
+    PYTHONPATH=src python -m benchmarks.parallel_benchmark --strikes 250 --levels 20
+Set NUMBA_NUM_THREADS to cap the thread counts tried.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel evaluation kernel across thread counts")
+    parser.add_argument("--strikes", type=int, default=250, help="The number of strikes in the chain, each with a call and a put")
+    parser.add_argument("--levels", type=int, default=20, help="The number of price levels on each side of every book")
+    parser.add_argument("--depth", type=float, default=10, help="The depth used for depth pricing")
+    parser.add_argument("--repeat", type=int, default=20, help="The number of timed passes per thread count")
+    arguments = parser.parse_args()
+
+    black76.warmup_jit()
+    parallel_evaluation.warmup_jit()
+    rng = np.random.default_rng(0)
+    instruments = make_instruments(arguments.strikes, int(time.time() + TAU * SECONDS_PER_YEAR), FORWARD_PRICE)
+    table = InstrumentTable(instruments)
+    store = OrderBookStore(table.names)
+    for instrument in instruments:
+        store.update(make_orderbook_message(instrument, FORWARD_PRICE, TAU, arguments.levels, int(time.time() * 1000), rng)["params"]["data"])
+    row_count = len(table)
+    indices = np.arange(row_count)
+    taus, forward_prices = table.taus(int(time.time() * 1000), indices), np.full(row_count, FORWARD_PRICE)
+    depths = np.array([arguments.depth])
+    initial_guesses = np.zeros((row_count, 1, 2))
+
+    def run_pass():
+        parallel_evaluation.evaluate_books(depths, store.bid_prices, store.bid_volumes, store.bid_counts, store.ask_prices, store.ask_volumes, store.ask_counts,
+                                           table.strikes, taus, forward_prices, table.is_calls, initial_guesses)
+
+    print(f"{'threads':<10}{'us/book':>10}{'books/s':>12}{'speedup':>10}")
+    single_thread_seconds = None
+    for thread_count in range(1, numba.config.NUMBA_NUM_THREADS + 1):
+        numba.set_num_threads(thread_count)
+        result = measure(f"parallel_{thread_count}", run_pass, row_count, arguments.repeat)
+        single_thread_seconds = single_thread_seconds or result.seconds_per_pass
+        print(f"{thread_count:<10}{result.seconds_per_op * 1e6:>10.2f}{1 / result.seconds_per_op:>12.0f}{single_thread_seconds / result.seconds_per_pass:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.in_memory_connection import InMemoryConnection
+from benchmarks.synthetic_chain import SECONDS_PER_YEAR, make_instruments, make_orderbook_message, make_ticker
+from instrument_monitor import InstrumentMonitor
+from lyra.order_book_store import OrderBookStore
+from lyra.push_decoder import decode_orderbook_push
+from lyra.subscription_listener import SubscriptionListener
+from lyra.ticker_cache import TickerCache
+from telegram_client.alert_dispatcher import AlertDispatcher
+from telegram_client.telegram_client import LoggingTelegramClient
+from utils import black76, depth_calculator
+
+"""
+Benchmarks for depth pricing, Black-76 pricing and IV solving, and the full evaluation pass over a synthetic chain.
+
+Run from the repository root with the packages in src importable, e.g.
+    PYTHONPATH=src python -m benchmarks.run_benchmarks --strikes 50 --levels 20
+Results are compared against benchmarks/baselines.json and the run fails if any benchmark is slower than its baseline
+by more than --threshold. Pass --update_baselines to store the current numbers instead.
+Baselines are stored as multiples of a calibration pass timed in the same process, so they carry over between machines
+that are uniformly faster or slower than the one they were taken on.
+"""
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+FORWARD_PRICE = 3000.0
+TAU = 30 / 365
+
+
+class BenchmarkResult:
+    __slots__ = ("name", "seconds_per_op", "ops", "seconds_per_pass", "peak_memory_kib")
+
+    def __init__(self, name: str, seconds_per_op: float, ops: int, seconds_per_pass: float, peak_memory_kib: float):
+        self.name = name
+        self.seconds_per_op = seconds_per_op
+        self.ops = ops
+        self.seconds_per_pass = seconds_per_pass
+        self.peak_memory_kib = peak_memory_kib
+
+
+def measure(name: str, run_pass: Callable[[], None], ops: int, repeat: int) -> BenchmarkResult:
+    """
+    Times run_pass `repeat` times after a warmup call and keeps the fastest pass, then runs it once more under tracemalloc for peak memory.
+    """
+    run_pass()
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run_pass()
+        timings.append(time.perf_counter() - started_at)
+    tracemalloc.start()
+    run_pass()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return BenchmarkResult(name, min(timings) / ops, ops, min(timings), peak_memory / 1024)
+
+
+def _calibration_pass():
+    total = 0.0
+    for value in range(20000):
+        total += value * 0.5
+    np.sort(np.random.default_rng(0).random(20000))
+
+
+def calibrate(repeat: int) -> float:
+    """
+    Returns the fastest time of a fixed mix of interpreter and numpy work, which every benchmark is compared in multiples of.
+    The pass is short, so it is repeated far more often than the benchmarks to find the machine's quiet speed.
+    """
+    return measure("calibration", _calibration_pass, 1, max(repeat * 10, 200)).seconds_per_pass
+
+
+def run_benchmarks(strike_count: int, levels: int, repeat: int, depth: float) -> List[BenchmarkResult]:
+    rng = np.random.default_rng(0)
+    timestamp = int(time.time() * 1000)
+    instruments = make_instruments(strike_count, int(time.time() + TAU * SECONDS_PER_YEAR), FORWARD_PRICE)
+    messages = [make_orderbook_message(instrument, FORWARD_PRICE, TAU, levels, timestamp, rng) for instrument in instruments]
+    sides = [side for message in messages for side in (message["params"]["data"]["bids"], message["params"]["data"]["asks"])]
+    parsed_sides = [np.array(side, dtype=np.float64) for side in sides]
+    payloads = [json.dumps(message) for message in messages]
+    store = OrderBookStore([instrument["instrument_name"] for instrument in instruments])
+    strikes = np.array([float(instrument["option_details"]["strike"]) for instrument in instruments])
+    is_calls = np.array([instrument["option_details"]["option_type"] == "C" for instrument in instruments])
+    prices = np.array([black76.b76_price(0.6, strike, FORWARD_PRICE, TAU, is_call) for strike, is_call in zip(strikes, is_calls)])
+    taus, forward_prices = np.full(len(instruments), TAU), np.full(len(instruments), FORWARD_PRICE)
+    scalar_count = min(len(instruments), 200)
+
+    results = [
+        # parsing the whole push and then the levels, which is what the listener did before decoding pushes selectively
+        measure("decode_json", lambda: [store.update(json.loads(payload)["params"]["data"]) for payload in payloads], len(payloads), repeat),
+        measure("decode_selective", lambda: [store.update_from(decode_orderbook_push(payload)) for payload in payloads], len(payloads), repeat),
+        measure("depth_price_strings", lambda: [depth_calculator.calculate_depth_price(depth, side) for side in sides], len(sides), repeat),
+        measure("depth_price_arrays", lambda: [depth_calculator.calculate_depth_price_from_arrays(depth, side[:, 0], side[:, 1]) for side in parsed_sides], len(sides), repeat),
+        measure("b76_price", lambda: [black76.b76_price(0.6, strike, FORWARD_PRICE, TAU, is_call) for strike, is_call in zip(strikes, is_calls)], len(instruments), repeat),
+        measure("iv_scalar", lambda: [black76.iv_from_b76_price(prices[i], strikes[i], TAU, FORWARD_PRICE, is_calls[i]) for i in range(scalar_count)], scalar_count, repeat),
+        measure("iv_batch", lambda: black76.iv_from_b76_prices(prices, strikes, taus, forward_prices, is_calls), len(instruments), repeat),
+    ]
+    results.append(_measure_evaluation_pass("evaluation_pass", instruments, levels, repeat, [(depth, 0.05)], rng))
+    # the extra tiers should only add a small fraction of the single tier pass
+    results.append(_measure_evaluation_pass("evaluation_pass_4_tiers", instruments, levels, repeat, [(depth / 10, 0.05), (depth / 2, 0.05), (depth, 0.05), (depth * 5, 0.05)], rng))
+    return results
+
+
+def _measure_evaluation_pass(name: str, instruments: List[Dict], levels: int, repeat: int, tiers: List[Tuple[float, float]], rng: np.random.Generator) -> BenchmarkResult:
+    """
+    Pushes a fresh book for every instrument through the listener and decides alerts on them all, which is one pass of the monitor's hot loop:
+    the ticker staleness check, depth pricing, IV solving, breach tracking and building whatever alerts are due.
+    The pass runs on an event loop owned here so measure can time it like the synchronous benchmarks.
+    """
+    tickers = {instrument["instrument_name"]: make_ticker(instrument, FORWARD_PRICE, TAU) for instrument in instruments}
+    connection = InMemoryConnection(tickers)
+    # no poll interval, the pass never waits since every book has just changed
+    monitor = InstrumentMonitor(instruments, tiers, 0.03, AlertDispatcher(LoggingTelegramClient()), connection, poll_interval_seconds=0)
+    table = monitor.instrument_table
+    listener = SubscriptionListener(table.names, connection)
+    ticker_cache = TickerCache(table.names, connection, max_staleness_seconds=float("inf"))
+    instruments_to_check = np.ones(len(table), dtype=bool)
+    # a few distinct books per instrument so passes are not all IV cache hits
+    books = [[json.dumps(make_orderbook_message(instrument, FORWARD_PRICE, TAU, levels, int(time.time() * 1000), rng)) for _ in range(8)] for instrument in instruments]
+    pass_count = 0
+    loop = asyncio.new_event_loop()
+
+    def run_pass():
+        nonlocal pass_count
+        for instrument_books in books:
+            connection.push(instrument_books[pass_count % len(instrument_books)])
+        loop.run_until_complete(monitor._determine_alerts(ticker_cache, listener, instruments_to_check))
+        pass_count += 1
+
+    try:
+        loop.run_until_complete(listener.subscribe())
+        loop.run_until_complete(ticker_cache.subscribe())
+        loop.run_until_complete(ticker_cache.refresh_stale(table.names))
+        return measure(name, run_pass, len(instruments), repeat)
+    finally:
+        loop.run_until_complete(listener.close())
+        loop.close()
+
+
+def compare_to_baselines(results: List[BenchmarkResult], size_key: str, threshold: float, calibration_seconds: float) -> List[str]:
+    if not os.path.exists(BASELINES_PATH):
+        return []
+    with open(BASELINES_PATH) as baselines_file:
+        baselines = json.load(baselines_file).get(size_key, {})
+    regressions = []
+    for result in results:
+        baseline = baselines.get(result.name)
+        relative_time = result.seconds_per_op / calibration_seconds
+        if baseline and relative_time > baseline * (1 + threshold):
+            regressions.append(f"{result.name} took {relative_time:.2e} calibration passes per op against a baseline of {baseline:.2e}, "
+                               f"{result.seconds_per_op * 1e6:.2f}us against {baseline * calibration_seconds * 1e6:.2f}us on this machine")
+    return regressions
+
+
+def update_baselines(results: List[BenchmarkResult], size_key: str, calibration_seconds: float):
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as baselines_file:
+            baselines = json.load(baselines_file)
+    baselines[size_key] = {result.name: result.seconds_per_op / calibration_seconds for result in results}
+    with open(BASELINES_PATH, "w") as baselines_file:
+        json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+        baselines_file.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark depth pricing, IV solving and the evaluation pass on a synthetic chain")
+    parser.add_argument("--strikes", type=int, default=50, help="The number of strikes in the chain, each with a call and a put")
+    parser.add_argument("--levels", type=int, default=20, help="The number of price levels on each side of every book")
+    parser.add_argument("--depth", type=float, default=10, help="The depth used for depth pricing")
+    parser.add_argument("--repeat", type=int, default=20, help="The number of timed passes per benchmark")
+    parser.add_argument("--threshold", type=float, default=0.25, help="The allowed slowdown against the baseline before the run fails")
+    parser.add_argument("--update_baselines", action="store_true", help="Store the results as the new baselines")
+    arguments = parser.parse_args()
+
+    black76.warmup_jit()
+    size_key = f"{arguments.strikes}x{arguments.levels}"
+    calibration_seconds = calibrate(arguments.repeat)
+    results = run_benchmarks(arguments.strikes, arguments.levels, arguments.repeat, arguments.depth)
+    # calibrated on both sides of the benchmarks so a slow patch during either doesn't skew every result
+    calibration_seconds = min(calibration_seconds, calibrate(arguments.repeat))
+    print(f"calibration pass took {calibration_seconds * 1e3:.2f}ms")
+    print(f"{'benchmark':<22}{'us/op':>12}{'ops/pass':>10}{'passes/s':>12}{'peak KiB':>12}")
+    for result in results:
+        print(f"{result.name:<22}{result.seconds_per_op * 1e6:>12.2f}{result.ops:>10}{1 / result.seconds_per_pass:>12.1f}{result.peak_memory_kib:>12.1f}")
+
+    if arguments.update_baselines:
+        update_baselines(results, size_key, calibration_seconds)
+        print(f"Stored baselines for {size_key} in {BASELINES_PATH}")
+        return
+    regressions = compare_to_baselines(results, size_key, arguments.threshold, calibration_seconds)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
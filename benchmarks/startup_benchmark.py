@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+"""
+Measures the time from process start to the first evaluated orderbook, the way a restarted container would see it.
+
+Every run starts a fresh interpreter that imports the monitor, warms up the JIT in a thread while subscribing like main does,
+and evaluates one book for every instrument. The first run uses an empty numba cache directory and the rest reuse it. Run from the repository root:
+    PYTHONPATH=src python -m benchmarks.startup_benchmark --runs 3
+"""
+
+
+async def _first_evaluation(strike_count: int, levels: int, connect_seconds: float) -> float:
+    # imported here so the child's import time is part of what is measured
+    import numpy as np
+
+    from benchmarks.in_memory_connection import InMemoryConnection
+    from benchmarks.run_benchmarks import FORWARD_PRICE, TAU
+    from benchmarks.synthetic_chain import SECONDS_PER_YEAR, make_instruments, make_orderbook_message, make_ticker
+    from instrument_monitor import InstrumentMonitor
+    from lyra.subscription_listener import SubscriptionListener
+    from lyra.ticker_cache import TickerCache
+    from telegram_client.alert_dispatcher import AlertDispatcher
+    from telegram_client.telegram_client import LoggingTelegramClient
+    from utils import black76
+
+    jit_warmup = asyncio.create_task(asyncio.to_thread(black76.warmup_jit))
+    instruments = make_instruments(strike_count, int(time.time() + TAU * SECONDS_PER_YEAR), FORWARD_PRICE)
+    connection = InMemoryConnection({instrument["instrument_name"]: make_ticker(instrument, FORWARD_PRICE, TAU) for instrument in instruments})
+    monitor = InstrumentMonitor(instruments, [(10, 0.05)], 0.03, AlertDispatcher(LoggingTelegramClient()), connection)
+    table = monitor.instrument_table
+    listener = SubscriptionListener(table.names, connection)
+    ticker_cache = TickerCache(table.names, connection)
+    # stands in for the websocket connect and subscription round trips that the warmup overlaps with
+    await asyncio.sleep(connect_seconds)
+    await listener.subscribe()
+    await ticker_cache.subscribe()
+    await ticker_cache.refresh_stale(table.names)
+    rng = np.random.default_rng(0)
+    for instrument in instruments:
+        connection.push(json.dumps(make_orderbook_message(instrument, FORWARD_PRICE, TAU, levels, int(time.time() * 1000), rng)))
+    await jit_warmup
+    indices = np.array([table.index(name) for name in listener.take_updates()], dtype=np.int64)
+    monitor.evaluate_order_books(indices, listener.order_books, ticker_cache, int(time.time() * 1000))
+    return time.time()
+
+
+def _run_child(arguments, cache_dir: str) -> float:
+    started_at = time.time()
+    output = subprocess.run([sys.executable, "-m", "benchmarks.startup_benchmark", "--child", "--strikes", str(arguments.strikes), "--levels", str(arguments.levels),
+                             "--connect_seconds", str(arguments.connect_seconds)],
+                            env={**os.environ, "NUMBA_CACHE_DIR": cache_dir}, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])["evaluated_at"] - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the time from process start to the first evaluated orderbook")
+    parser.add_argument("--strikes", type=int, default=50, help="The number of strikes in the chain, each with a call and a put")
+    parser.add_argument("--levels", type=int, default=20, help="The number of price levels on each side of every book")
+    parser.add_argument("--runs", type=int, default=3, help="The number of process starts, the first with an empty numba cache")
+    parser.add_argument("--connect_seconds", type=float, default=0.0, help="Simulated time spent connecting and subscribing")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child:
+        print(json.dumps({"evaluated_at": asyncio.run(_first_evaluation(arguments.strikes, arguments.levels, arguments.connect_seconds))}))
+        return
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for run in range(arguments.runs):
+            seconds = _run_child(arguments, cache_dir)
+            print(f"{'cold cache' if run == 0 else 'warm cache':<12}{seconds:>8.2f}s to the first evaluated orderbook")
+
+
+if __name__ == "__main__":
+    main()
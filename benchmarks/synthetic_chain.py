@@ -0,0 +1,52 @@
+from typing import Dict, List
+
+import numpy as np
+
+from utils.black76 import b76_delta, b76_price
+
+"""
+Synthetic option chains shaped like Lyra's get_instruments, get_ticker and orderbook messages.
+Books are laid around the Black-76 price of a smile so IV solving sees realistic inputs.
+"""
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+
+def make_instruments(strike_count: int, expiry_seconds: int, forward_price: float = 3000.0, currency: str = "ETH", expiry_date: str = "20991231") -> List[Dict]:
+    """
+    Returns a call and a put for strike_count strikes spread around the forward.
+    """
+    instruments = []
+    for strike in np.linspace(forward_price * 0.5, forward_price * 1.5, strike_count).round():
+        for option_type in ["C", "P"]:
+            instruments.append({
+                "instrument_name": f"{currency}-{expiry_date}-{int(strike)}-{option_type}",
+                "option_details": {"strike": str(strike), "expiry": expiry_seconds, "option_type": option_type},
+            })
+    return instruments
+
+
+def smile_vol(strike: float, forward_price: float) -> float:
+    return 0.6 + 0.4 * np.log(strike / forward_price) ** 2
+
+
+def make_ticker(instrument: Dict, forward_price: float, tau: float) -> Dict:
+    strike = float(instrument["option_details"]["strike"])
+    sigma = smile_vol(strike, forward_price)
+    delta = b76_delta(sigma, strike, forward_price, tau, instrument["option_details"]["option_type"] == "C")
+    return {"option_pricing": {"forward_price": str(forward_price), "delta": str(delta), "iv": str(sigma)}}
+
+
+def make_orderbook_message(instrument: Dict, forward_price: float, tau: float, levels: int, timestamp: int, rng: np.random.Generator) -> Dict:
+    """
+    Builds an orderbook push with `levels` price levels per side, one tick apart, with random volumes and a little noise on the mid.
+    """
+    strike = float(instrument["option_details"]["strike"])
+    fair_price = b76_price(smile_vol(strike, forward_price), strike, forward_price, tau, instrument["option_details"]["option_type"] == "C")
+    fair_price = max(fair_price * (1 + rng.normal(0, 0.002)), 1.0)
+    tick = max(fair_price * 0.01, 0.1)
+    level_offsets = np.arange(1, levels + 1) * tick
+    bids = [[f"{max(fair_price - offset, 0.1):.2f}", f"{volume:.2f}"] for offset, volume in zip(level_offsets, rng.uniform(0.1, 5, levels))]
+    asks = [[f"{fair_price + offset:.2f}", f"{volume:.2f}"] for offset, volume in zip(level_offsets, rng.uniform(0.1, 5, levels))]
+    return {"method": "subscription", "params": {"channel": f"orderbook.{instrument['instrument_name']}.1.100", "data": {
+        "instrument_name": instrument["instrument_name"], "timestamp": timestamp, "bids": bids, "asks": asks}}}
@@ -1,134 +1,282 @@
-import json
+import asyncio
 import logging
 import time
-from datetime import datetime
-from typing import Dict, List
+from typing import Awaitable, Dict, List, Tuple
 
-import telegram
-import websockets
+import numpy as np
 
-import utils.black76
-from lyra.constants import LYRA_WEBSOCKET_URI
+from lyra.connection_pool import ConnectionPool
+from lyra.instrument_table import InstrumentTable
+from lyra.order_book_store import OrderBookStore
+from lyra.rpc_client import RpcClient
 from lyra.subscription_listener import SubscriptionListener
-from src.utils import depth_calculator
-from telegram_client.telegram_client import TelegramClient
+from lyra.ticker_cache import TickerCache
+from utils import depth_calculator, parallel_evaluation
+from utils.breach_tracker import BreachTracker
+from utils.clock import Clock
+from utils.iv_cache import IvCache
+from utils.metrics import NULL_METRICS, Metrics, NullMetrics
+from telegram_client.alert_dispatcher import Alert, AlertDispatcher
 
 logger = logging.getLogger(__name__)
 
 
 class InstrumentMonitor:
     _seconds_to_millis_multiplier = 1000
+    _delta_refresh_millis = 300000
+    _breach_persistence_millis = 60000
+    _evaluation_modes = ("single", "parallel")
 
-    def __init__(self, instruments: List[Dict], spread_limit: float, depth: float, delta: float, telegram_client: TelegramClient):
+    def __init__(self, instruments: List[Dict], tiers: List[Tuple[float, float]], delta: float, alert_dispatcher: AlertDispatcher, rpc_client: RpcClient | ConnectionPool,
+                 clock: Clock = Clock(), metrics: Metrics | NullMetrics = NULL_METRICS, poll_interval_seconds: float = 1.0, evaluation_mode: str = "single"):
         if not instruments:
             raise ValueError("Instruments cannot be empty")
-        self._instruments = instruments
-        self._spread_limit = spread_limit
+        if not tiers:
+            raise ValueError("Tiers cannot be empty")
+        if evaluation_mode not in self._evaluation_modes:
+            raise ValueError(f"Evaluation mode must be one of {self._evaluation_modes}, got {evaluation_mode}")
+        self._instrument_table = InstrumentTable(instruments)
+        # tiers are (depth, spread limit) pairs, kept in ascending depth so each book side is priced at every depth in one walk
+        tiers = sorted(tiers)
+        self._tier_count = len(tiers)
+        # every IV and breach is tracked per (instrument, tier) slot, row * tier_count + tier
+        self._iv_cache = IvCache(len(self._instrument_table) * self._tier_count)
+        # instrument names look like ETH-20240329-3000-C and every instrument in a monitor shares currency and expiry
+        self._currency, self._expiry_date = instruments[0]["instrument_name"].split("-")[:2]
+        self._spread_limits = np.array([spread_limit for _, spread_limit in tiers])
         # dividing by 2 since we only care about depth on one side (bid or asks). They'll both sum up to depth * 2 ideally.
-        self._depth = depth / 2
+        self._depths = np.array([depth for depth, _ in tiers]) / 2
         self._delta = delta
-        self._telegram_client = telegram_client
+        self._alert_dispatcher = alert_dispatcher
+        self._alert_header = self._build_alert_header()
+        self._recovery_header = self._build_recovery_header()
+        self._rpc_client = rpc_client
+        self._clock = clock
+        self._poll_interval_seconds = poll_interval_seconds
+        self._evaluation_mode = evaluation_mode
+        slot_count = len(self._instrument_table) * self._tier_count
+        self._spread_breaches = BreachTracker(slot_count, self._breach_persistence_millis)
+        self._liquidity_breaches = BreachTracker(slot_count, self._breach_persistence_millis)
+        # the latest spread and filled (bid, ask) depth volumes per slot, so alerts that come due between book updates can still say what they were
+        self._spreads = np.zeros(slot_count)
+        self._depth_volumes = np.zeros((slot_count, 2))
+        self._metrics = metrics
+        self._metrics_enabled = metrics.enabled
+        self._receive_to_evaluation = metrics.histogram("orderbook_receive_to_evaluation_seconds", "Time from receiving an orderbook to evaluating it")
+        self._depth_duration = metrics.histogram("evaluation_depth_seconds", "Time spent on depth pricing per evaluation pass")
+        self._iv_duration = metrics.histogram("evaluation_iv_seconds", "Time spent solving IVs per evaluation pass")
+        self._parallel_evaluation_duration = metrics.histogram("evaluation_parallel_seconds", "Time spent pricing depth and solving IVs in parallel per evaluation pass")
+        self._alert_decision_duration = metrics.histogram("evaluation_alert_decision_seconds", "Time spent deciding on alerts per evaluation pass")
+        self._subscribed = asyncio.Event()
 
-    async def start_monitor(self):
-        ws_client = await websockets.connect(LYRA_WEBSOCKET_URI)
-        listener = SubscriptionListener([instrument["instrument_name"] for instrument in self._instruments])
+    @property
+    def instrument_table(self) -> InstrumentTable:
+        return self._instrument_table
+
+    async def start_monitor(self, warmup: Awaitable | None = None):
+        """
+        Subscribes and evaluates orderbooks until expiry. Evaluation waits on warmup if given, e.g. the JIT warmup running alongside subscribing.
+        """
+        # the listener and ticker cache share the table's row order so the hot loop can index all of them the same way
+        # orderbook channels only need to be deep enough to cover the deepest tier
+        listener = SubscriptionListener(self._instrument_table.names, self._rpc_client, self._clock, self._metrics, volume_to_cover=float(self._depths[-1]))
+        ticker_cache = TickerCache(self._instrument_table.names, self._rpc_client, self._clock)
+        labels = {"currency": self._currency, "expiry": self._expiry_date}
+        self._metrics.gauge("orderbooks_tracked", "Instruments with at least one orderbook", lambda: listener.order_books.book_count, labels)
+        self._metrics.gauge("orderbooks_pending_evaluation", "Instruments whose orderbook changed since the last evaluation", lambda: listener.pending_update_count, labels)
+        instrument_labels = [{**labels, "instrument": name} for name in self._instrument_table.names]
+        for index, name in enumerate(self._instrument_table.names):
+            self._metrics.gauge("orderbook_messages_received", "Orderbook pushes received per instrument", lambda index=index: int(listener.message_counts[index]), instrument_labels[index])
+            self._metrics.gauge("orderbook_bytes_received", "Orderbook push bytes received per instrument", lambda index=index: int(listener.message_bytes[index]), instrument_labels[index])
+            self._metrics.gauge("orderbook_subscription_depth", "Levels per side of the orderbook channel subscribed to per instrument",
+                                lambda name=name: listener.subscription_depth(name), instrument_labels[index])
         try:
-            await listener.create_subscription_task()
-            current_epoch_milli = int(time.time() * self._seconds_to_millis_multiplier)
-            expiry = self._instruments[0]["option_details"]["expiry"]
+            await listener.subscribe()
+            await ticker_cache.subscribe()
+            self._subscribed.set()
+            if warmup is not None:
+                # shielded since other monitors wait on the same warmup
+                await asyncio.shield(warmup)
+            current_epoch_milli = int(self._clock.time() * self._seconds_to_millis_multiplier)
+            next_delta_refresh_milli = current_epoch_milli
+            expiry = self._instrument_table.expiries[0]
             while current_epoch_milli < expiry * self._seconds_to_millis_multiplier:
-                instruments_to_check = await self._get_instrument_names_within_delta(ws_client)
-                instruments_to_alert = await self._determine_instruments_outside_spread(ws_client, listener, instruments_to_check)
-                current_epoch_milli = int(time.time() * self._seconds_to_millis_multiplier)
-                if instruments_to_alert:
-                    await self._send_messages_to_telegram(instruments_to_alert)
+                if current_epoch_milli >= next_delta_refresh_milli:
+                    instruments_to_check = await self._get_instruments_within_delta(ticker_cache)
+                    # instruments that left our delta range stop being tracked rather than recovering
+                    slots_to_skip = np.repeat(~instruments_to_check, self._tier_count)
+                    self._spread_breaches.reset(slots_to_skip)
+                    self._liquidity_breaches.reset(slots_to_skip)
+                    next_delta_refresh_milli = current_epoch_milli + self._delta_refresh_millis
+                    logger.info(f"Received {int(listener.message_counts.sum())} orderbook pushes totalling {int(listener.message_bytes.sum())} bytes for {self._currency} {self._expiry_date}")
+                    logger.info(f"IV cache for {self._currency} {self._expiry_date} has {len(self._iv_cache)} entries, {self._iv_cache.hits} hits, "
+                                f"{self._iv_cache.misses} misses and {round(self._iv_cache.average_iterations, 2)} iterations per solve")
+                # the dispatcher sends from its own task so evaluation never waits on telegram
+                for alert in await self._determine_alerts(ticker_cache, listener, instruments_to_check):
+                    self._alert_dispatcher.submit(alert)
+                current_epoch_milli = int(self._clock.time() * self._seconds_to_millis_multiplier)
             logger.info("Expired date has hit. Closing connections.")
         finally:
-            await ws_client.close()
+            self._metrics.remove_gauges(labels)
+            for labels_to_remove in instrument_labels:
+                self._metrics.remove_gauges(labels_to_remove)
             await listener.close()
+            await ticker_cache.close()
+
+    async def wait_until_subscribed(self):
+        await self._subscribed.wait()
+
+    async def _determine_alerts(self, ticker_cache: TickerCache, listener: SubscriptionListener, instruments_to_check: np.ndarray) -> List[Alert]:
+        """
+        instruments_to_check is a boolean mask over the instrument table.
+        Waits up to the poll interval for books to change, feeds the changed books we care about through the breach trackers and
+        returns the alerts and recoveries that are due, including breaches that have now lasted long enough without their book changing.
+        """
+        # only wake up when a book we care about changed, instead of re-evaluating unchanged books in a busy loop
+        updated_instruments = await listener.wait_for_updates(self._poll_interval_seconds)
+        current_epoch_milli = int(self._clock.time() * self._seconds_to_millis_multiplier)
+        indices = np.fromiter((self._instrument_table.index(name) for name in updated_instruments), dtype=np.int64, count=len(updated_instruments))
+        indices = indices[instruments_to_check[indices]]
+        empty = np.zeros(0, dtype=np.int64)
+        spread_alerts, spread_recoveries, liquidity_alerts, liquidity_recoveries = empty, empty, empty, empty
+        if indices.size:
+            await ticker_cache.refresh_stale_at(indices)
+            timestamps = listener.order_books.timestamps[indices]
+            if self._metrics_enabled:
+                self._receive_to_evaluation.observe_many(self._clock.time() - listener.received_at[indices])
+            if self._evaluation_mode == "parallel":
+                depth_volumes, bid_ivs, ask_ivs = await self.evaluate_order_books_parallel(indices, listener.order_books, ticker_cache, current_epoch_milli)
+            else:
+                depth_volumes, bid_ivs, ask_ivs = self.evaluate_order_books(indices, listener.order_books, ticker_cache, current_epoch_milli)
+            alert_decision_started_at = time.perf_counter() if self._metrics_enabled else 0.0
+            spreads = ask_ivs - bid_ivs
+            if logger.isEnabledFor(logging.DEBUG):
+                for position, index in enumerate(indices):
+                    logger.debug(f"Spreads for {self._instrument_table.names[index]} are {spreads[position] * 100}% and iv_b76_bid is {bid_ivs[position]} and iv_b76_ask is {ask_ivs[position]}")
+            slots = self._slots(indices)
+            slot_timestamps = np.repeat(timestamps, self._tier_count)
+            self._spreads[slots] = spreads.ravel()
+            self._depth_volumes[slots] = depth_volumes.reshape(-1, 2)
+            spread_alerts, spread_recoveries = self._spread_breaches.update(slots, (spreads >= self._spread_limits).ravel(), slot_timestamps)
+            liquidity_alerts, liquidity_recoveries = self._liquidity_breaches.update(slots, (depth_volumes.min(axis=2) < self._depths).ravel(), slot_timestamps)
+            if self._metrics_enabled:
+                self._alert_decision_duration.observe(time.perf_counter() - alert_decision_started_at)
+        spread_alerts = np.concatenate((spread_alerts, self._spread_breaches.due(current_epoch_milli)))
+        liquidity_alerts = np.concatenate((liquidity_alerts, self._liquidity_breaches.due(current_epoch_milli)))
+
+        names = self._instrument_table.names
+        alerts = []
+        for slot in spread_alerts:
+            index, tier = divmod(int(slot), self._tier_count)
+            logger.info(f"Spread has been too high for {names[index]} at a depth of {self._tier_depth(tier)} for over 60 seconds")
+            alerts.append(Alert(names[index], f"spread {tier}", f"had a spread of {round(self._spreads[slot] * 100, 2)}% at a depth of {self._tier_depth(tier)}", self._alert_header))
+        for slot in liquidity_alerts:
+            index, tier = divmod(int(slot), self._tier_count)
+            logger.info(f"Instrument {names[index]} has not had valid volume or spread at a depth of {self._tier_depth(tier)} for over 60 seconds")
+            bids_volume, asks_volume = self._depth_volumes[slot]
+            lower_volume_str = "ask" if asks_volume < bids_volume else "bid"
+            alerts.append(Alert(names[index], f"liquidity {tier}", f"had low {lower_volume_str} liquidity of {round(min(asks_volume, bids_volume), 2)} at a depth of {self._tier_depth(tier)}",
+                                self._alert_header))
+        recoveries = []
+        for slot in spread_recoveries:
+            index, tier = divmod(int(slot), self._tier_count)
+            recoveries.append(Alert(names[index], f"spread {tier}", f"spread is back to {round(self._spreads[slot] * 100, 2)}% at a depth of {self._tier_depth(tier)}",
+                                    self._recovery_header, recovery=True))
+        for slot in liquidity_recoveries:
+            index, tier = divmod(int(slot), self._tier_count)
+            recoveries.append(Alert(names[index], f"liquidity {tier}", f"liquidity is back to {round(self._depth_volumes[slot].min(), 2)} at a depth of {self._tier_depth(tier)}",
+                                    self._recovery_header, recovery=True))
+        return alerts + recoveries
+
+    def evaluate_order_books(self, indices: np.ndarray, order_books: OrderBookStore, ticker_cache: TickerCache, current_epoch_milli: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Prices the given instrument table rows at every tier's depth and solves their IVs.
+        Returns the filled (bid, ask) volumes shaped (rows, tiers, 2) along with the bid and ask IVs shaped (rows, tiers).
+        """
+        started_at = time.perf_counter() if self._metrics_enabled else 0.0
+        depth_prices = np.zeros((indices.size, self._tier_count, 2))
+        depth_volumes = np.zeros((indices.size, self._tier_count, 2))
+        for position, index in enumerate(indices):
+            depth_prices[position, :, 0], depth_volumes[position, :, 0] = depth_calculator.calculate_depth_prices_from_arrays(self._depths, *order_books.bids_at(index))
+            depth_prices[position, :, 1], depth_volumes[position, :, 1] = depth_calculator.calculate_depth_prices_from_arrays(self._depths, *order_books.asks_at(index))
+        depth_finished_at = time.perf_counter() if self._metrics_enabled else 0.0
+        bid_ivs, ask_ivs = self._get_ivs(indices, ticker_cache, current_epoch_milli, depth_prices[:, :, 0], depth_prices[:, :, 1])
+        if self._metrics_enabled:
+            self._depth_duration.observe(depth_finished_at - started_at)
+            self._iv_duration.observe(time.perf_counter() - depth_finished_at)
+        return depth_volumes, bid_ivs, ask_ivs
+
+    async def evaluate_order_books_parallel(self, indices: np.ndarray, order_books: OrderBookStore, ticker_cache: TickerCache,
+                                            current_epoch_milli: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Same as evaluate_order_books, but depth pricing and IV solving run across numba's threads outside the event loop so websocket reads keep flowing.
+        The rows are copied out of the store first so books updated while the kernel runs are never read half written.
+        IVs warm start from the IV cache's last solves instead of going through its lookups.
+        """
+        started_at = time.perf_counter() if self._metrics_enabled else 0.0
+        table = self._instrument_table
+        bid_counts, ask_counts = order_books.bid_counts[indices], order_books.ask_counts[indices]
+        # only copy as many levels as the deepest book in the batch has
+        width = int(max(bid_counts.max(), ask_counts.max()))
+        slots = self._slots(indices)
+        depth_volumes, ivs, iterations = await asyncio.to_thread(
+            parallel_evaluation.evaluate_books, self._depths,
+            order_books.bid_prices[indices, :width], order_books.bid_volumes[indices, :width], bid_counts,
+            order_books.ask_prices[indices, :width], order_books.ask_volumes[indices, :width], ask_counts,
+            table.strikes[indices], table.taus(current_epoch_milli, indices), ticker_cache.forward_prices[indices], table.is_calls[indices],
+            self._iv_cache.last_ivs[slots].reshape(indices.size, self._tier_count, 2),
+        )
+        self._iv_cache.record_solves(slots, ivs.reshape(-1, 2), iterations.reshape(-1, 2))
+        if self._metrics_enabled:
+            self._parallel_evaluation_duration.observe(time.perf_counter() - started_at)
+        return depth_volumes, ivs[:, :, 0], ivs[:, :, 1]
+
+    async def _get_instruments_within_delta(self, ticker_cache: TickerCache) -> np.ndarray:
+        """
+        Returns a boolean mask over the instrument table of instruments whose delta is within our threshold.
+        """
+        await ticker_cache.refresh_stale_at(np.arange(len(self._instrument_table)))
+        absolute_deltas = np.abs(ticker_cache.deltas)
+        within_delta = (self._delta <= absolute_deltas) & (absolute_deltas <= 1 - self._delta)
+        logger.debug(f"{int(within_delta.sum())} of {len(self._instrument_table)} instruments are within delta {self._delta}")
+        return within_delta
 
-    async def _determine_instruments_outside_spread(self, ws, listener: SubscriptionListener, instruments: List[Dict]) -> Dict[str, str]:
-        last_valid_spreads = {instrument["instrument_name"]: int(time.time() * self._seconds_to_millis_multiplier) for instrument in instruments}
-        last_valid_liquidity_spreads = last_valid_spreads.copy()
-        low_spread_alerts = {}
-        low_liquidity_alerts = {}
-        sixty_seconds_in_millis = 60000
-        current_epoch_milli = int(time.time() * self._seconds_to_millis_multiplier)
-        five_minutes_from_now_milli = current_epoch_milli + 300000
-        while current_epoch_milli < five_minutes_from_now_milli:
-            ticker = await self._get_ticker(ws, instruments[0]["instrument_name"])
-            for instrument in instruments:
-                instrument_name = instrument["instrument_name"]
-                subscription_message = await listener.get_message(instrument_name)
-                bids = subscription_message["params"]["data"]["bids"]
-                asks = subscription_message["params"]["data"]["asks"]
-                asks_price, asks_volume = depth_calculator.calculate_depth_price(self._depth, asks)
-                bids_price, bids_volume = depth_calculator.calculate_depth_price(self._depth, bids)
-                iv_b76_bid = self._get_iv(instrument, ticker, current_epoch_milli, bids_price)
-                iv_b76_ask = self._get_iv(instrument, ticker, current_epoch_milli, asks_price)
-                difference = iv_b76_ask - iv_b76_bid
-                logger.debug(f"Spread for {instrument_name} is {difference * 100}% and iv_b76_bid is {iv_b76_bid} and iv_b76_ask is {iv_b76_ask}")
-                if min(asks_volume, bids_volume) < self._depth:
-                    if subscription_message["params"]["data"]["timestamp"] - last_valid_liquidity_spreads[instrument_name] >= sixty_seconds_in_millis:
-                        logger.info(f"Instrument {instrument_name} has not had valid volume or spread for over 60 seconds")
-                        lower_volume_str = "ask" if asks_volume < bids_volume else "bid"
-                        low_liquidity_alerts[instrument_name] = f"had low {lower_volume_str} liquidity of {round(min(asks_volume, bids_volume), 2)}"
-                else:
-                    last_valid_liquidity_spreads[instrument_name] = subscription_message["params"]["data"]["timestamp"]
-
-                if difference >= self._spread_limit:
-                    if subscription_message["params"]["data"]["timestamp"] - last_valid_spreads[instrument_name] >= sixty_seconds_in_millis:
-                        logger.info(f"Spread has been too high for {instrument_name} for over 60 seconds")
-                        low_spread_alerts[instrument_name] = f"had a spread of {round(difference * 100, 2)}%"
-                else:
-                    last_valid_spreads[instrument_name] = subscription_message["params"]["data"]["timestamp"]
-                current_epoch_milli = int(time.time() * self._seconds_to_millis_multiplier)
-        # I'm letting low liquidity alerts take precedence over low spread alerts, but this isn't a hard rule.
-        return {**low_spread_alerts, **low_liquidity_alerts}
-
-    async def _get_instrument_names_within_delta(self, ws) -> List[Dict]:
-        instruments_within_delta = []
-        for instrument in self._instruments:
-            instrument_name = instrument["instrument_name"]
-            ticker = await self._get_ticker(ws, instrument_name)
-            instrument_delta = float(ticker["result"]["option_pricing"]["delta"])
-            if self._delta <= abs(instrument_delta) <= 1 - self._delta:
-                logger.debug(f"instrument is within delta 0 or 1: {instrument_delta} for instrument {instrument_name}")
-                instruments_within_delta.append(instrument)
-        return instruments_within_delta
-
-    async def _send_messages_to_telegram(self, instruments_to_alert: Dict[str, str]) -> telegram.Message:
+    def _build_alert_header(self) -> str:
         message = f"""
-        Alert! Within the last 5 minutes the following instruments were flagged for high spread width or low liquidity for an ETH depth of {self._depth * 2}.
-        Spread threshold: {round(self._spread_limit * 100, 2)}%
-        Liquidity threshold: {round(self._depth * 2, 2)} ETH
+        Alert! The following instruments have had high spread width or low liquidity for over 60 seconds.
+        Expiry: {self._expiry_date}
+        Depths and spread thresholds: {", ".join(f"{self._tier_depth(tier)} at {round(spread_limit * 100, 2)}%" for tier, spread_limit in enumerate(self._spread_limits))}
+
+        Here are alerting instruments and their alert message:"""
+        return "\n".join([line.strip() for line in message.splitlines()])
+
+    def _build_recovery_header(self) -> str:
+        return f"Recovered! The following {self._currency} {self._expiry_date} instruments are back within our thresholds:"
+
+    def _tier_depth(self, tier: int) -> str:
+        return f"{round(self._depths[tier] * 2, 2)} {self._currency}"
+
+    def _slots(self, indices: np.ndarray) -> np.ndarray:
+        """
+        The (instrument, tier) slots of the given rows, ordered by row and then tier.
+        """
+        return (indices[:, None] * self._tier_count + np.arange(self._tier_count)).ravel()
 
-        Here are alerting instruments and their alert message:
-        """ + "\n".join(
-           sorted([f"{instrument}: {message}" for instrument, message in instruments_to_alert.items()])
+    def _get_ivs(self, indices: np.ndarray, ticker_cache: TickerCache, current_epoch_milli: int, bids_prices: np.ndarray, asks_prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Solves the bid and ask IVs of every tier of the given instrument table rows in a single batch.
+        Prices and the returned IVs are shaped (rows, tiers).
+        """
+        table = self._instrument_table
+        slots = self._slots(indices)
+        rows = np.repeat(indices, self._tier_count)
+        ivs = self._iv_cache.solve(
+            np.tile(slots, 2),
+            np.repeat(np.arange(2), slots.size),
+            np.concatenate((bids_prices.ravel(), asks_prices.ravel())),
+            np.tile(table.strikes[rows], 2),
+            np.tile(table.taus(current_epoch_milli, rows), 2),
+            np.tile(ticker_cache.forward_prices[rows], 2),
+            np.tile(table.is_calls[rows], 2),
         )
-        left_aligned_message = "\n".join([line.strip() for line in message.splitlines()])
-        logger.debug("Sending messages to telegram")
-        return await self._telegram_client.send_message(left_aligned_message)
-
-    async def _get_ticker(self, ws, instrument_name: str) -> Dict:
-        ticker_message = {"id": "99", "method": "public/get_ticker", "params": {"instrument_name": instrument_name}}
-        ticker_response = await self._make_call(ws, ticker_message)
-        return ticker_response
-
-    async def _make_call(self, ws, message) -> Dict:
-        await ws.send(json.dumps(message))
-        response = json.loads(await ws.recv())
-        if "error" in response:
-            raise ValueError(f"Error in response {response}")
-        return response
-
-    def _get_iv(self, instrument: Dict, ticker: Dict, current_epoch_milli: int, price: float) -> float:
-        frwrd_price = float(ticker["result"]["option_pricing"]["forward_price"])
-        strike_price = float(instrument["option_details"]["strike"])
-        expiry = instrument["option_details"]["expiry"]
-        datetime1 = datetime.fromtimestamp(current_epoch_milli / 1000)
-        datetime2 = datetime.fromtimestamp(expiry)
-        difference_in_years = (datetime2 - datetime1).total_seconds() / (365 * 24 * 60 * 60)
-        is_call = instrument["option_details"]["option_type"] == "C"
-        return utils.black76.iv_from_b76_price(price, strike_price, difference_in_years, frwrd_price, is_call)
+        return ivs[:slots.size].reshape(indices.size, self._tier_count), ivs[slots.size:].reshape(indices.size, self._tier_count)
@@ -0,0 +1,172 @@
+import asyncio
+import itertools
+import logging
+from typing import Callable, Dict, List, Set, Tuple
+
+import websockets
+from lyra.constants import LYRA_WEBSOCKET_URI
+from lyra.recording import Recorder
+from lyra.rpc_client import RpcClient
+from utils.metrics import NULL_METRICS, Metrics, NullMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Shards subscriptions across a bounded pool of RpcClient connections, each with its own reader task.
+    A connection holds at most max_channels_per_connection channels and new connections are only opened
+    once the existing ones are full. Requests are spread round-robin over the open connections.
+    A connection that is lost is replaced in the background, with backoff, and its channels are subscribed again on the new one.
+    It exposes the same call/subscribe interface as RpcClient so listeners can use either.
+    """
+    def __init__(self, uri: str = LYRA_WEBSOCKET_URI, max_connections: int = 8, max_channels_per_connection: int = 500, max_in_flight: int = 64, timeout_seconds: float = 10.0,
+                 recorder: Recorder | None = None, metrics: Metrics | NullMetrics = NULL_METRICS):
+        self._uri = uri
+        self._recorder = recorder
+        self._metrics = metrics
+        self._max_connections = max_connections
+        self._max_channels_per_connection = max_channels_per_connection
+        self._max_in_flight = max_in_flight
+        self._timeout_seconds = timeout_seconds
+        self._clients: List[RpcClient] = []
+        self._channel_counts: List[int] = []
+        self._channel_shards: Dict[str, int] = {}
+        self._channel_handlers: Dict[str, Tuple[Callable[[Dict | str, int], None], bool]] = {}
+        self._reconnect_tasks: Set[asyncio.Task] = set()
+        self._reconnecting_shards: Set[int] = set()
+        self._closing = False
+        self._reconnected = asyncio.Event()
+        self._next_client = itertools.count()
+        self._lock = asyncio.Lock()
+        metrics.gauge("lyra_connections", "Open websocket connections to Lyra", lambda: len(self._clients))
+        metrics.gauge("lyra_subscribed_channels", "Channels subscribed across all connections", lambda: len(self._channel_shards))
+        metrics.gauge("lyra_rpc_pending_requests", "Lyra requests waiting for a reply", lambda: sum(client.pending_count for client in self._clients))
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def connect(self):
+        await self._open_connection()
+
+    async def close(self):
+        self._closing = True
+        for task in self._reconnect_tasks:
+            task.cancel()
+        await asyncio.gather(*self._reconnect_tasks, return_exceptions=True)
+        for client in self._clients:
+            await client.close()
+
+    async def call(self, method: str, params: Dict, timeout_seconds: float | None = None) -> Dict:
+        """
+        Sends the request on the next open connection. If every connection is down it waits for one to be replaced,
+        up to the request timeout, and raises ConnectionError if none is.
+        """
+        for _ in range(len(self._clients)):
+            client = self._clients[next(self._next_client) % len(self._clients)]
+            if not client.is_closed:
+                return await client.call(method, params, timeout_seconds)
+        self._reconnected.clear()
+        try:
+            await asyncio.wait_for(self._reconnected.wait(), timeout_seconds or self._timeout_seconds)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"Every connection to {self._uri} is down") from None
+        return await self.call(method, params, timeout_seconds)
+
+    async def call_many(self, method: str, params_list: List[Dict]) -> List[Dict]:
+        return await asyncio.gather(*(self.call(method, params) for params in params_list))
+
+    async def subscribe(self, channels: List[str], handler: Callable[[Dict | str, int], None], raw: bool = False):
+        """
+        Fills the open connections up to their channel cap first and opens new ones for the rest.
+        See RpcClient.subscribe for what raw handlers get.
+        Raises ValueError if the channels do not fit in the pool.
+        """
+        async with self._lock:
+            remaining_channels = [channel for channel in channels if channel not in self._channel_shards]
+            # checked up front so a subscription that can't fit doesn't leave new connections open
+            room_left = sum(self._max_channels_per_connection - count for count in self._channel_counts) \
+                + (self._max_connections - len(self._clients)) * self._max_channels_per_connection
+            if len(remaining_channels) > room_left:
+                raise ValueError(f"Cannot subscribe to {len(remaining_channels)} more channels, all {self._max_connections} connections would be full")
+            shard_channels: Dict[int, List[str]] = {}
+            shard = 0
+            while remaining_channels:
+                if shard == len(self._clients):
+                    await self._open_connection()
+                room = self._max_channels_per_connection - self._channel_counts[shard]
+                if room > 0:
+                    shard_channels[shard], remaining_channels = remaining_channels[:room], remaining_channels[room:]
+                shard += 1
+            for shard, channels_for_shard in shard_channels.items():
+                # a lost connection is subscribed again once it is replaced, so its channels are only recorded here
+                if not self._clients[shard].is_closed:
+                    await self._clients[shard].subscribe(channels_for_shard, handler, raw)
+                self._channel_counts[shard] += len(channels_for_shard)
+                self._channel_shards.update({channel: shard for channel in channels_for_shard})
+                self._channel_handlers.update({channel: (handler, raw) for channel in channels_for_shard})
+
+    async def unsubscribe(self, channels: List[str]):
+        async with self._lock:
+            shard_channels: Dict[int, List[str]] = {}
+            for channel in channels:
+                shard = self._channel_shards.pop(channel, None)
+                self._channel_handlers.pop(channel, None)
+                if shard is not None:
+                    shard_channels.setdefault(shard, []).append(channel)
+            for shard, channels_for_shard in shard_channels.items():
+                await self._clients[shard].unsubscribe(channels_for_shard)
+                self._channel_counts[shard] -= len(channels_for_shard)
+
+    async def _open_connection(self):
+        client = await self._connect_client(len(self._clients))
+        self._clients.append(client)
+        self._channel_counts.append(0)
+        logger.info(f"Opened connection {len(self._clients)} of at most {self._max_connections} to {self._uri}")
+
+    async def _connect_client(self, shard: int) -> RpcClient:
+        client = RpcClient(self._uri, self._max_in_flight, self._timeout_seconds, self._recorder, self._metrics)
+        await client.connect()
+        client.closed.add_done_callback(lambda closed, shard=shard: self._on_connection_lost(shard, closed.result()))
+        return client
+
+    def _on_connection_lost(self, shard: int, exception: BaseException | None):
+        # connections we closed ourselves resolve with None
+        if self._closing or exception is None or shard in self._reconnecting_shards:
+            return
+        self._reconnecting_shards.add(shard)
+        task = asyncio.create_task(self._reconnect(shard))
+        self._reconnect_tasks.add(task)
+        task.add_done_callback(self._reconnect_tasks.discard)
+
+    async def _reconnect(self, shard: int, max_backoff_seconds: float = 30.0):
+        """
+        Replaces the lost connection of a shard and subscribes its channels again, retrying with exponential backoff until it works.
+        """
+        backoff_seconds = 1.0
+        while True:
+            client = None
+            try:
+                async with self._lock:
+                    client = await self._connect_client(shard)
+                    self._clients[shard] = client
+                    channels_by_handler: Dict[Tuple[Callable[[Dict | str, int], None], bool], List[str]] = {}
+                    for channel, channel_shard in self._channel_shards.items():
+                        if channel_shard == shard:
+                            channels_by_handler.setdefault(self._channel_handlers[channel], []).append(channel)
+                    for (handler, raw), channels in channels_by_handler.items():
+                        await client.subscribe(channels, handler, raw)
+                logger.info(f"Replaced lost connection {shard + 1} to {self._uri} and resubscribed {self._channel_counts[shard]} channels")
+                self._reconnecting_shards.discard(shard)
+                self._reconnected.set()
+                return
+            except (OSError, ValueError, asyncio.TimeoutError, websockets.WebSocketException) as exception:
+                if client is not None:
+                    await client.close()
+                logger.warning(f"Failed to replace lost connection {shard + 1} to {self._uri}, retrying in {backoff_seconds} seconds: {exception!r}")
+                await asyncio.sleep(backoff_seconds)
+                backoff_seconds = min(backoff_seconds * 2, max_backoff_seconds)
@@ -0,0 +1,46 @@
+from typing import Dict, List
+
+import numpy as np
+
+
+class InstrumentTable:
+    """
+    Static per-instrument data parsed once from the get_instruments response.
+    Row i of every array belongs to names[i], so the hot loop can work on indices and never touch the raw JSON.
+    """
+    _seconds_per_year = 365 * 24 * 60 * 60
+
+    def __init__(self, instruments: List[Dict]):
+        self._names = [instrument["instrument_name"] for instrument in instruments]
+        self._indices: Dict[str, int] = {name: index for index, name in enumerate(self._names)}
+        self._strikes = np.array([float(instrument["option_details"]["strike"]) for instrument in instruments])
+        self._expiries = np.array([instrument["option_details"]["expiry"] for instrument in instruments], dtype=np.float64)
+        self._is_calls = np.array([instrument["option_details"]["option_type"] == "C" for instrument in instruments])
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def names(self) -> List[str]:
+        return self._names
+
+    @property
+    def strikes(self) -> np.ndarray:
+        return self._strikes
+
+    @property
+    def expiries(self) -> np.ndarray:
+        return self._expiries
+
+    @property
+    def is_calls(self) -> np.ndarray:
+        return self._is_calls
+
+    def index(self, name: str) -> int | None:
+        return self._indices.get(name)
+
+    def taus(self, current_epoch_milli: int, indices: np.ndarray) -> np.ndarray:
+        """
+        Time to expiry in years for the given rows.
+        """
+        return (self._expiries[indices] - current_epoch_milli / 1000) / self._seconds_per_year
@@ -0,0 +1,101 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from lyra.push_decoder import OrderBookUpdate
+
+
+class OrderBookStore:
+    """
+    Keeps the latest orderbook of every instrument in preallocated float64 arrays, one row per instrument.
+    Each update is written once on arrival so readers never touch the raw JSON strings.
+    Bids are stored in descending price order and asks in ascending price order, the same way Lyra sends them.
+    """
+    def __init__(self, instruments: List[str], max_levels: int = 100):
+        self._indices: Dict[str, int] = {instrument: index for index, instrument in enumerate(instruments)}
+        self._max_levels = max_levels
+        self._bid_prices = np.zeros((len(instruments), max_levels))
+        self._bid_volumes = np.zeros((len(instruments), max_levels))
+        self._ask_prices = np.zeros((len(instruments), max_levels))
+        self._ask_volumes = np.zeros((len(instruments), max_levels))
+        self._bid_counts = np.zeros(len(instruments), dtype=np.int64)
+        self._ask_counts = np.zeros(len(instruments), dtype=np.int64)
+        self._timestamps = np.zeros(len(instruments), dtype=np.int64)
+        self._has_book = np.zeros(len(instruments), dtype=bool)
+
+    def update(self, data: Dict) -> int | None:
+        """
+        Parses an orderbook push's data payload into the arrays and returns the row it was written to.
+        Updates for instruments we are not tracking are ignored.
+        """
+        return self.update_from(OrderBookUpdate.from_data(data))
+
+    def update_from(self, update: OrderBookUpdate) -> int | None:
+        """
+        Same as update for a push that was already decoded into arrays.
+        """
+        index = self._indices.get(update.instrument_name)
+        if index is None:
+            return None
+        self._bid_counts[index] = self._write_levels(update.bids, self._bid_prices[index], self._bid_volumes[index])
+        self._ask_counts[index] = self._write_levels(update.asks, self._ask_prices[index], self._ask_volumes[index])
+        self._timestamps[index] = update.timestamp
+        self._has_book[index] = True
+        return index
+
+    @property
+    def book_count(self) -> int:
+        return int(self._has_book.sum())
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps
+
+    @property
+    def bid_prices(self) -> np.ndarray:
+        return self._bid_prices
+
+    @property
+    def bid_volumes(self) -> np.ndarray:
+        return self._bid_volumes
+
+    @property
+    def bid_counts(self) -> np.ndarray:
+        return self._bid_counts
+
+    @property
+    def ask_prices(self) -> np.ndarray:
+        return self._ask_prices
+
+    @property
+    def ask_volumes(self) -> np.ndarray:
+        return self._ask_volumes
+
+    @property
+    def ask_counts(self) -> np.ndarray:
+        return self._ask_counts
+
+    def bids_at(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        count = self._bid_counts[index]
+        return self._bid_prices[index, :count], self._bid_volumes[index, :count]
+
+    def asks_at(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        count = self._ask_counts[index]
+        return self._ask_prices[index, :count], self._ask_volumes[index, :count]
+
+    def has_book(self, instrument: str) -> bool:
+        return bool(self._has_book[self._indices[instrument]])
+
+    def timestamp(self, instrument: str) -> int:
+        return int(self._timestamps[self._indices[instrument]])
+
+    def bids(self, instrument: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self.bids_at(self._indices[instrument])
+
+    def asks(self, instrument: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self.asks_at(self._indices[instrument])
+
+    def _write_levels(self, levels: np.ndarray, prices: np.ndarray, volumes: np.ndarray) -> int:
+        count = min(levels.shape[0], self._max_levels)
+        prices[:count] = levels[:count, 0]
+        volumes[:count] = levels[:count, 1]
+        return count
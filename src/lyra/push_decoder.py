@@ -0,0 +1,198 @@
+import re
+from typing import Dict, Tuple
+
+import numpy as np
+from numba import njit
+
+"""
+Decodes Lyra subscription pushes straight from the received bytes, without building the nested dicts json.loads would.
+Orderbook pushes only have their instrument name, timestamp and bid and ask levels read, every other field is skipped,
+and the levels are parsed into arrays by a compiled kernel that reads the bytes in place.
+This expects JSON the way Lyra and json.dumps write it, with each level a [price, volume] pair of strings or numbers.
+"""
+
+_LEVEL_CHARACTERS = b'"[] \t\r\n'
+_TIMESTAMP = re.compile(rb"\s*(-?\d+)")
+_NO_LEVELS = np.zeros((0, 2))
+# every power a decimal with up to 15 significant digits needs, all exact as float64
+_POWERS_OF_TEN = 10.0 ** np.arange(23)
+
+
+class OrderBookUpdate:
+    """
+    The parts of an orderbook push we use. bids and asks are float64 (levels, 2) arrays of price and volume in the order Lyra sent them.
+    """
+    __slots__ = ("instrument_name", "timestamp", "bids", "asks")
+
+    def __init__(self, instrument_name: str, timestamp: int, bids: np.ndarray, asks: np.ndarray):
+        self.instrument_name = instrument_name
+        self.timestamp = timestamp
+        self.bids = bids
+        self.asks = asks
+
+    @classmethod
+    def from_data(cls, data: Dict) -> "OrderBookUpdate":
+        """
+        Builds an update from the data payload of an already parsed push.
+        """
+        return cls(data["instrument_name"], data["timestamp"], _levels_from_list(data["bids"]), _levels_from_list(data["asks"]))
+
+
+def push_channel(payload: str) -> str | None:
+    """
+    Returns the channel of a subscription push, or None for anything else such as replies to requests.
+    """
+    method_start = _value_start(payload, '"method"')
+    if method_start < 0 or payload[method_start:method_start + 32].lstrip()[:14] != '"subscription"':
+        return None
+    channel_start = _value_start(payload, '"channel"')
+    if channel_start < 0:
+        return None
+    channel_start = payload.index('"', channel_start) + 1
+    return payload[channel_start:payload.index('"', channel_start)]
+
+
+def decode_orderbook_push(payload: str | bytes | memoryview) -> OrderBookUpdate:
+    """
+    Reads the instrument name, timestamp and levels of an orderbook push. Raises ValueError if any of them is missing or malformed.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    elif not isinstance(payload, bytes):
+        payload = bytes(payload)
+    data_start = _value_start(payload, b'"data"')
+    name_start = _value_start(payload, b'"instrument_name"', data_start)
+    timestamp_start = _value_start(payload, b'"timestamp"', data_start)
+    if data_start < 0 or name_start < 0 or timestamp_start < 0:
+        raise ValueError(f"Orderbook push is missing its data, instrument name or timestamp: {payload[:200]}")
+    timestamp = _TIMESTAMP.match(payload, timestamp_start)
+    if timestamp is None:
+        raise ValueError(f"Orderbook push has a malformed timestamp: {payload[:200]}")
+    name_start = payload.index(b'"', name_start) + 1
+    # np.frombuffer shares the payload's memory, so the kernel reads the levels where they were received
+    buffer = np.frombuffer(payload, dtype=np.uint8)
+    return OrderBookUpdate(payload[name_start:payload.index(b'"', name_start)].decode(), int(timestamp.group(1)),
+                           _levels(payload, buffer, b'"bids"', data_start), _levels(payload, buffer, b'"asks"', data_start))
+
+
+def warmup_jit():
+    """
+    Compiles the level parser, or loads it from numba's cache, so the first push doesn't pay for it.
+    """
+    decode_orderbook_push(b'{"params": {"data": {"instrument_name": "x", "timestamp": 1, "bids": [["1.5", "2"]], "asks": []}}}')
+
+
+def _value_start(payload: str | bytes, key: str | bytes, start: int = 0) -> int:
+    """
+    Returns the position right after the colon following the first key at or after start, or -1 if the key is not there.
+    """
+    if start < 0:
+        return -1
+    key_start = payload.find(key, start)
+    if key_start < 0:
+        return -1
+    colon = payload.find(b":" if isinstance(payload, bytes) else ":", key_start + len(key))
+    return colon + 1 if colon >= 0 else -1
+
+
+def _levels(payload: bytes, buffer: np.ndarray, key: bytes, start: int) -> np.ndarray:
+    levels_start = _value_start(payload, key, start)
+    if levels_start < 0:
+        raise ValueError(f"Orderbook push is missing {key.decode()}: {payload[:200]}")
+    levels, count = _parse_levels(buffer, levels_start, _POWERS_OF_TEN)
+    if count >= 0:
+        return levels[:count] if count else _NO_LEVELS
+    return _parse_levels_exactly(payload, levels_start)
+
+
+def _parse_levels_exactly(payload: bytes, levels_start: int) -> np.ndarray:
+    """
+    The slow path for levels the kernel gives up on, such as numbers with exponents or more digits than a float64 holds exactly.
+    """
+    first_level = payload.find(b"[", levels_start) + 1
+    if first_level == 0 or payload[levels_start:first_level].strip() != b"[":
+        raise ValueError(f"Orderbook push has malformed levels: {payload[:200]}")
+    if payload[first_level:].lstrip().startswith(b"]"):
+        return _NO_LEVELS
+    levels_end = payload.find(b"]]", first_level)
+    if levels_end < 0:
+        raise ValueError(f"Orderbook push has malformed levels: {payload[:200]}")
+    # every level is [price, volume], so dropping brackets, quotes and whitespace leaves price,volume,price,volume,...
+    values = payload[first_level:levels_end].translate(None, _LEVEL_CHARACTERS).split(b",")
+    if len(values) % 2:
+        raise ValueError(f"Orderbook push has a level without both a price and a volume: {payload[:200]}")
+    return np.array(values, dtype=np.float64).reshape(-1, 2)
+
+
+@njit(cache=True)
+def _parse_levels(buffer: np.ndarray, position: int, powers_of_ten: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Parses the [[price, volume], ...] array starting at position. Returns the levels and their count,
+    or a count of -1 if the levels are malformed or hold a number that can't be parsed exactly here.
+    A number is parsed exactly when it has at most 15 significant digits and no exponent,
+    since then it is an integer divided by a power of ten and both are exact float64s.
+    """
+    length = buffer.shape[0]
+    # a level takes at least 6 bytes, [1,1],
+    levels = np.empty(((length - position) // 6 + 1, 2))
+    count = 0
+    nesting = 0
+    values_in_level = 0
+    while position < length:
+        character = buffer[position]
+        if character == 91:  # [
+            nesting += 1
+            if nesting > 2:
+                return levels, -1
+            values_in_level = 0
+            position += 1
+        elif character == 93:  # ]
+            if nesting == 0:
+                return levels, -1
+            if nesting == 2:
+                if values_in_level != 2:
+                    return levels, -1
+                count += 1
+            nesting -= 1
+            position += 1
+            if nesting == 0:
+                return levels, count
+        elif character == 44 or character == 34 or character == 32 or character == 9 or character == 10 or character == 13:  # , " and whitespace
+            position += 1
+        elif nesting == 2 and (character == 45 or 48 <= character <= 57):  # - and digits
+            if values_in_level == 2:
+                return levels, -1
+            negative = character == 45
+            if negative:
+                position += 1
+            mantissa = 0
+            digits = 0
+            has_digits = False
+            decimals = 0
+            seen_point = False
+            while position < length:
+                character = buffer[position]
+                if 48 <= character <= 57:
+                    has_digits = True
+                    mantissa = mantissa * 10 + (character - 48)
+                    if mantissa > 0:
+                        digits += 1
+                    if seen_point:
+                        decimals += 1
+                elif character == 46 and not seen_point:  # .
+                    seen_point = True
+                else:
+                    break
+                position += 1
+            if not has_digits or digits > 15 or decimals >= powers_of_ten.shape[0] or character == 101 or character == 69:  # e and E
+                return levels, -1
+            value = mantissa / powers_of_ten[decimals]
+            levels[count, values_in_level] = -value if negative else value
+            values_in_level += 1
+        else:
+            return levels, -1
+    return levels, -1
+
+
+def _levels_from_list(levels: list) -> np.ndarray:
+    return np.array(levels, dtype=np.float64).reshape(-1, 2) if levels else _NO_LEVELS
@@ -0,0 +1,77 @@
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, Tuple
+
+"""
+Append-only recording of Lyra websocket traffic.
+
+The file starts with an 8 byte magic header followed by records of
+<float64 receive time in epoch seconds><uint8 kind><uint32 payload length><payload>
+all little endian. Subscription pushes are stored as the raw text we received and RPC replies as a
+JSON object holding the request method, params and the reply so the replay can answer the same requests.
+"""
+
+MAGIC = b"LYRAREC1"
+RECORD_HEADER = struct.Struct("<dBI")
+RPC_REPLY = 0
+SUBSCRIPTION_PUSH = 1
+
+
+class Recorder:
+    """
+    Appends records through a buffered file that is flushed at most every flush_interval_seconds of receive time and on close.
+    Records are written from the reader task, so a write syscall per push would land on the busiest path.
+    A crash loses at most the last interval, and a record cut short is skipped by RecordingReader.
+    """
+    def __init__(self, path: str, flush_interval_seconds: float = 1.0, buffer_size: int = 1 << 20):
+        is_new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab", buffering=buffer_size)
+        self._flush_interval_seconds = flush_interval_seconds
+        self._next_flush_at = 0.0
+        if is_new_file:
+            self._file.write(MAGIC)
+
+    def record_call(self, received_at: float, method: str, params: Dict, response: Dict):
+        self._write(received_at, RPC_REPLY, json.dumps({"method": method, "params": params, "response": response}).encode())
+
+    def record_push(self, received_at: float, message: str | bytes):
+        self._write(received_at, SUBSCRIPTION_PUSH, message.encode() if isinstance(message, str) else message)
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, received_at: float, kind: int, payload: bytes):
+        self._file.write(RECORD_HEADER.pack(received_at, kind, len(payload)))
+        self._file.write(payload)
+        if received_at >= self._next_flush_at:
+            self._file.flush()
+            self._next_flush_at = received_at + self._flush_interval_seconds
+
+
+class RecordingReader:
+    """
+    Memory maps a recording and iterates its records without copying the payloads.
+    """
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a Lyra recording")
+
+    def __iter__(self) -> Iterator[Tuple[float, int, memoryview]]:
+        view = memoryview(self._mmap)
+        offset = len(MAGIC)
+        while offset + RECORD_HEADER.size <= len(view):
+            received_at, kind, length = RECORD_HEADER.unpack_from(view, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > len(view):
+                # the recorder was stopped halfway through writing this record
+                break
+            yield received_at, kind, view[offset:offset + length]
+            offset += length
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
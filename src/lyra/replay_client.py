@@ -0,0 +1,126 @@
+import asyncio
+import bisect
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+from lyra.push_decoder import push_channel
+from lyra.recording import RPC_REPLY, SUBSCRIPTION_PUSH, RecordingReader
+from utils.clock import VirtualClock
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayClient:
+    """
+    Stands in for RpcClient/ConnectionPool and plays a recording back instead of talking to Lyra.
+    Recorded RPC replies answer calls with the same method and params, ticker requests get the latest reply recorded
+    at or before the virtual time, and subscription pushes are sent to their channel handlers once start is called.
+    Pushes are routed by channel kind and instrument, so subscriptions with a different depth or interval than the recording still get them.
+    speed is a multiple of real time, with 0 meaning as fast as possible.
+    """
+    def __init__(self, path: str, clock: VirtualClock, speed: float = 0.0):
+        self._reader = RecordingReader(path)
+        self._clock = clock
+        self._speed = speed
+        self._replies: Dict[str, List[Tuple[float, Dict]]] = {}
+        self._pushes: List[Tuple[float, memoryview]] = []
+        for received_at, kind, payload in self._reader:
+            if kind == RPC_REPLY:
+                call = json.loads(bytes(payload))
+                self._replies.setdefault(self._reply_key(call["method"], call["params"]), []).append((received_at, call["response"]))
+            elif kind == SUBSCRIPTION_PUSH:
+                self._pushes.append((received_at, payload))
+        if self._pushes:
+            self._clock.advance_to(self._pushes[0][0])
+        self._channel_handlers: Dict[str, Tuple[Callable[[Dict | str, int], None], bool]] = {}
+        # the subscribed channels behind each route, since a listener moving between depths holds two channels for a moment
+        self._route_channels: Dict[str, Set[str]] = {}
+        self._replay_task: asyncio.Task | None = None
+        self._messages_replayed = 0
+        self._replay_seconds = 0.0
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @property
+    def messages_replayed(self) -> int:
+        return self._messages_replayed
+
+    @property
+    def messages_per_second(self) -> float:
+        return self._messages_replayed / self._replay_seconds if self._replay_seconds else 0.0
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        if self._replay_task:
+            self._replay_task.cancel()
+        self._pushes.clear()
+        self._reader.close()
+
+    def start(self):
+        self._replay_task = asyncio.create_task(self._replay())
+
+    async def wait_until_finished(self):
+        await self._replay_task
+
+    async def call(self, method: str, params: Dict, timeout_seconds: float | None = None) -> Dict:
+        replies = self._replies.get(self._reply_key(method, params))
+        if not replies:
+            raise ValueError(f"No recorded reply for {method} with params {params}")
+        position = bisect.bisect_right(replies, self._clock.time(), key=lambda reply: reply[0])
+        return replies[max(position - 1, 0)][1]
+
+    async def call_many(self, method: str, params_list: List[Dict]) -> List[Dict]:
+        return [await self.call(method, params) for params in params_list]
+
+    async def subscribe(self, channels: List[str], handler: Callable[[Dict | str, int], None], raw: bool = False):
+        for channel in channels:
+            route = self._route(channel)
+            self._channel_handlers[route] = handler, raw
+            self._route_channels.setdefault(route, set()).add(channel)
+
+    async def unsubscribe(self, channels: List[str]):
+        for channel in channels:
+            route = self._route(channel)
+            route_channels = self._route_channels.get(route, set())
+            route_channels.discard(channel)
+            if not route_channels:
+                self._route_channels.pop(route, None)
+                self._channel_handlers.pop(route, None)
+
+    async def _replay(self):
+        started_at = time.perf_counter()
+        first_received_at = self._pushes[0][0] if self._pushes else 0.0
+        for received_at, payload in self._pushes:
+            if self._speed:
+                delay = (received_at - first_received_at) / self._speed - (time.perf_counter() - started_at)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif self._messages_replayed % 100 == 0:
+                # let the monitors evaluate between bursts when playing back at max speed
+                await asyncio.sleep(0)
+            self._clock.advance_to(received_at)
+            raw_message = bytes(payload).decode()
+            handler, raw = self._channel_handlers.get(self._route(push_channel(raw_message) or ""), (None, False))
+            if handler:
+                handler(raw_message if raw else json.loads(raw_message), len(payload))
+            self._messages_replayed += 1
+        self._replay_seconds = time.perf_counter() - started_at
+        logger.info(f"Replayed {self._messages_replayed} messages in {round(self._replay_seconds, 2)} seconds ({round(self.messages_per_second)} messages per second)")
+
+    @staticmethod
+    def _route(channel: str) -> str:
+        # channels look like orderbook.{instrument_name}.{group}.{depth} or ticker.{instrument_name}.{interval}
+        return ".".join(channel.split(".")[:2])
+
+    @staticmethod
+    def _reply_key(method: str, params: Dict) -> str:
+        return json.dumps({"method": method, "params": params}, sort_keys=True)
@@ -0,0 +1,157 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Tuple
+
+import websockets
+from lyra.constants import LYRA_WEBSOCKET_URI
+from lyra.push_decoder import push_channel
+from lyra.recording import Recorder
+from utils.metrics import NULL_METRICS, Metrics, NullMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class RpcClient:
+    """
+    Pipelined JSON-RPC client for the Lyra websocket.
+    Every request gets a unique id and a pending future, and a single reader task routes replies back by id
+    and subscription pushes to the handler registered for their channel. This lets callers have many requests
+    in flight on one socket, bounded by max_in_flight.
+    """
+    def __init__(self, uri: str = LYRA_WEBSOCKET_URI, max_in_flight: int = 64, timeout_seconds: float = 10.0, recorder: Recorder | None = None,
+                 metrics: Metrics | NullMetrics = NULL_METRICS):
+        self._uri = uri
+        self._recorder = recorder
+        self._metrics_enabled = metrics.enabled
+        self._round_trip = metrics.histogram("lyra_rpc_round_trip_seconds", "Time from sending a Lyra request to receiving its reply")
+        self._timeout_seconds = timeout_seconds
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._channel_handlers: Dict[str, Tuple[Callable[[Dict | str, int], None], bool]] = {}
+        self._reader_task: asyncio.Task | None = None
+        self._closed: asyncio.Future | None = None
+        self._ws: websockets.WebSocketClientProtocol | None = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def connect(self):
+        self._start_reader(await websockets.connect(self._uri))
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._ws:
+            await self._ws.close()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    @property
+    def closed(self) -> asyncio.Future:
+        """
+        Resolves once the reader stops, with the exception that ended it, or None if close was called.
+        Owners add a done callback to find out about a lost connection, since its subscriptions go quiet with it.
+        """
+        return self._closed
+
+    @property
+    def is_closed(self) -> bool:
+        return self._reader_task is None or self._reader_task.done()
+
+    async def call(self, method: str, params: Dict, timeout_seconds: float | None = None) -> Dict:
+        """
+        Sends a request and waits for the reply with the same id. Raises ValueError if Lyra returns an error.
+        """
+        if self.is_closed:
+            raise ConnectionError(f"Connection to {self._uri} is closed")
+        async with self._in_flight:
+            request_id = next(self._ids)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            try:
+                sent_at = time.perf_counter()
+                await self._ws.send(json.dumps({"id": request_id, "method": method, "params": params}))
+                response = await asyncio.wait_for(future, timeout_seconds or self._timeout_seconds)
+                if self._metrics_enabled:
+                    self._round_trip.observe(time.perf_counter() - sent_at)
+            finally:
+                self._pending.pop(request_id, None)
+        if self._recorder:
+            self._recorder.record_call(time.time(), method, params, response)
+        if "error" in response:
+            raise ValueError(f"Error in response {response}")
+        return response
+
+    async def call_many(self, method: str, params_list: List[Dict]) -> List[Dict]:
+        return await asyncio.gather(*(self.call(method, params) for params in params_list))
+
+    async def subscribe(self, channels: List[str], handler: Callable[[Dict | str, int], None], raw: bool = False):
+        """
+        Subscribes to the channels and routes each of their pushes to handler along with the push's size in bytes.
+        Raw handlers get the push text as received and decode it themselves, everyone else gets the parsed JSON.
+        """
+        for channel in channels:
+            self._channel_handlers[channel] = handler, raw
+        sub_response = await self.call("subscribe", {"channels": channels})
+        if "result" not in sub_response or "status" not in sub_response["result"]:
+            raise ValueError(f"Subscription failed with output {sub_response}")
+        failed_subscriptions = [channel for channel, status in sub_response["result"]["status"].items() if status != "ok"]
+        if failed_subscriptions:
+            raise ValueError(f"Failed to subscribe to channels {failed_subscriptions}")
+
+    async def unsubscribe(self, channels: List[str]):
+        for channel in channels:
+            self._channel_handlers.pop(channel, None)
+        if self.is_closed:
+            # the connection is already gone, so there is nothing to unsubscribe from
+            return
+        await self.call("unsubscribe", {"channels": channels})
+
+    def _start_reader(self, ws: websockets.WebSocketClientProtocol):
+        self._ws = ws
+        self._closed = asyncio.get_running_loop().create_future()
+        self._reader_task = asyncio.create_task(self._read_messages())
+        self._reader_task.add_done_callback(self._on_reader_done)
+
+    def _on_reader_done(self, reader_task: asyncio.Task):
+        exception = None if reader_task.cancelled() else reader_task.exception()
+        if exception is not None:
+            logger.error(f"Connection to {self._uri} was lost with {len(self._channel_handlers)} subscribed channels: {exception!r}")
+        if not self._closed.done():
+            self._closed.set_result(exception)
+
+    async def _read_messages(self):
+        try:
+            while True:
+                raw_message = await self._ws.recv()
+                # pushes are routed on their channel alone so raw handlers never pay for parsing the whole message
+                channel = push_channel(raw_message)
+                if channel is None:
+                    message = json.loads(raw_message)
+                    future = self._pending.get(message.get("id"))
+                    if future and not future.done():
+                        future.set_result(message)
+                    continue
+                if self._recorder:
+                    self._recorder.record_push(time.time(), raw_message)
+                handler, raw = self._channel_handlers.get(channel, (None, False))
+                if handler:
+                    try:
+                        handler(raw_message if raw else json.loads(raw_message), len(raw_message))
+                    except Exception:
+                        logger.exception(f"Failed to handle message on channel {channel}")
+        except BaseException as exception:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Connection to {self._uri} was lost: {exception!r}"))
+            raise
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+class SubscriptionDepth:
+    """
+    Picks the orderbook channel depth per instrument, out of the depths Lyra offers, that covers the volume we price at.
+    A book that fills every level of its channel without covering the volume widens to the next depth.
+    A book whose volume has been covered within the next smaller depth for narrow_after consecutive updates narrows to it,
+    so a single deep update doesn't make the subscription flap.
+    """
+    depths = (1, 10, 20, 100)
+
+    def __init__(self, instrument_count: int, volume_to_cover: float, initial_depth: int = 10, narrow_after: int = 100):
+        if initial_depth not in self.depths:
+            raise ValueError(f"Subscription depth must be one of {self.depths}, got {initial_depth}")
+        self._volume_to_cover = volume_to_cover
+        self._narrow_after = narrow_after
+        self._depth_levels = np.full(instrument_count, self.depths.index(initial_depth), dtype=np.int64)
+        self._covered_streaks = np.zeros(instrument_count, dtype=np.int64)
+
+    def depth(self, index: int) -> int:
+        return self.depths[self._depth_levels[index]]
+
+    def set_depth(self, index: int, depth: int):
+        self._depth_levels[index] = self.depths.index(depth)
+        self._covered_streaks[index] = 0
+
+    def observe(self, index: int, bid_volumes: np.ndarray, ask_volumes: np.ndarray) -> int | None:
+        """
+        Takes the level volumes of both sides of an instrument's latest book and returns the depth to switch its subscription to, or None to keep it.
+        """
+        depth_level = self._depth_levels[index]
+        depth = self.depths[depth_level]
+        bid_levels_needed, ask_levels_needed = self._levels_needed(bid_volumes), self._levels_needed(ask_volumes)
+        if bid_levels_needed < 0 or ask_levels_needed < 0:
+            self._covered_streaks[index] = 0
+            # a side that ran out before filling every level of the channel is the whole book, so a deeper channel wouldn't help
+            truncated = (bid_levels_needed < 0 and bid_volumes.shape[0] >= depth) or (ask_levels_needed < 0 and ask_volumes.shape[0] >= depth)
+            if truncated and depth_level + 1 < len(self.depths):
+                self._depth_levels[index] = depth_level + 1
+                return self.depths[depth_level + 1]
+            return None
+        levels_needed = max(bid_levels_needed, ask_levels_needed)
+        if depth_level > 0 and levels_needed <= self.depths[depth_level - 1]:
+            self._covered_streaks[index] += 1
+            if self._covered_streaks[index] >= self._narrow_after:
+                self._covered_streaks[index] = 0
+                self._depth_levels[index] = depth_level - 1
+                return self.depths[depth_level - 1]
+        else:
+            self._covered_streaks[index] = 0
+        return None
+
+    def _levels_needed(self, volumes: np.ndarray) -> int:
+        """
+        The number of levels it takes to cover our volume, or -1 if the side doesn't cover it.
+        """
+        levels_needed = int(np.searchsorted(np.cumsum(volumes), self._volume_to_cover)) + 1
+        return levels_needed if levels_needed <= volumes.shape[0] else -1
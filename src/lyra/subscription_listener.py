@@ -1,59 +1,152 @@
 import asyncio
-import json
 import logging
-from typing import Dict, List
+from typing import Dict, List, Set
 
-import websockets
-from lyra.constants import LYRA_WEBSOCKET_URI
+import numpy as np
+from lyra.connection_pool import ConnectionPool
+from lyra.order_book_store import OrderBookStore
+from lyra.push_decoder import decode_orderbook_push
+from lyra.rpc_client import RpcClient
+from lyra.subscription_depth import SubscriptionDepth
+from utils.clock import Clock
+from utils.metrics import NULL_METRICS, Metrics, NullMetrics
 
 logger = logging.getLogger(__name__)
 
 
 class SubscriptionListener:
-    def __init__(self, instruments: List[str]):
-        self._instrument_results: Dict[str, Dict | None] = {instrument: None for instrument in instruments}
-        self._subscription_task: asyncio.Task | None = None
-        self._ws: websockets.WebSocketClientProtocol | None = None
-
-    async def create_subscription_task(self):
-        subscription_message = {"id": "1", "method": "subscribe", "params": {
-            "channels": [f"orderbook.{instrument}.1.100" for instrument in self._instrument_results.keys()]}}
-        self._ws = await websockets.connect(LYRA_WEBSOCKET_URI)
-        await self._ws.send(json.dumps(subscription_message))
-        sub_response = json.loads(await self._ws.recv())
-        if "result" not in sub_response or "status" not in sub_response["result"]:
-            raise ValueError(f"Subscription failed with output {sub_response}")
-        failed_subscriptions = []
-        for instrument_name, status in sub_response["result"]["status"].items():
-            if status != "ok":
-                failed_subscriptions.append(instrument_name)
-        if failed_subscriptions:
-            raise ValueError(f"Failed to subscribe to instruments {failed_subscriptions}")
-        self._subscription_task = asyncio.create_task(self._listen_to_messages())
+    """
+    Subscribes to the orderbooks of the given instruments and keeps their latest books in an OrderBookStore.
+    When volume_to_cover is given, each instrument's channel depth adapts to the shallowest one that covers that volume on both sides,
+    which cuts the levels sent and decoded per push. Otherwise every instrument gets 100 levels.
+    Grouping always stays at 1 since coarser groupings round level prices into buckets and would skew the prices we compute at depth.
+    """
+    def __init__(self, instruments: List[str], rpc_client: RpcClient | ConnectionPool, clock: Clock = Clock(), metrics: Metrics | NullMetrics = NULL_METRICS,
+                 volume_to_cover: float | None = None):
+        self._instruments = instruments
+        self._indices: Dict[str, int] = {instrument: index for index, instrument in enumerate(instruments)}
+        self._rpc_client = rpc_client
+        self._subscription_depth = SubscriptionDepth(len(instruments), volume_to_cover) if volume_to_cover is not None else None
+        self._channels = [self._channel(instrument, self._subscription_depth.depth(index) if self._subscription_depth else 100) for index, instrument in enumerate(instruments)]
+        self._resubscribe_tasks: Set[asyncio.Task] = set()
+        # channels a resubscribe is moving away from, until they are unsubscribed
+        self._channels_to_leave: Set[str] = set()
+        self._order_books = OrderBookStore(instruments)
+        self._message_counts = np.zeros(len(instruments), dtype=np.int64)
+        self._message_bytes = np.zeros(len(instruments), dtype=np.int64)
+        self._updated_instruments: Set[str] = set()
+        self._updates_available = asyncio.Event()
+        self._clock = clock
+        self._metrics_enabled = metrics.enabled
+        # local receive time in seconds of the latest book per instrument, only kept when metrics are enabled
+        self._received_at = np.zeros(len(instruments))
+        self._exchange_to_receive = metrics.histogram("lyra_orderbook_exchange_to_receive_seconds", "Time from the exchange timestamp of an orderbook push to us receiving it")
+
+    async def subscribe(self):
+        await self._rpc_client.subscribe(self._channels, self._on_message, raw=True)
 
     async def close(self):
-        if self._subscription_task:
-            self._subscription_task.cancel()
-        if self._ws:
-            await self._ws.close()
-
-    async def get_message(self, instrument: str) -> Dict:
-        retry_count = 0
-        while not self._instrument_results[instrument]:
-            if retry_count == 5:
-                raise ValueError(
-                    f"Failed to get message for {instrument} after {retry_count} retries. Please investigate.")
-            logger.debug(f"Retrying to get message for {instrument}")
-            await asyncio.sleep(1)
-            retry_count += 1
-        return self._instrument_results[instrument]
-
-    async def _listen_to_messages(self):
+        for task in self._resubscribe_tasks:
+            task.cancel()
+        await asyncio.gather(*self._resubscribe_tasks, return_exceptions=True)
+        # a cancelled resubscribe may have subscribed its new channel without leaving the old one yet
+        await self._rpc_client.unsubscribe(self._channels + sorted(self._channels_to_leave))
+        self._channels_to_leave.clear()
+
+    @property
+    def order_books(self) -> OrderBookStore:
+        return self._order_books
+
+    @property
+    def received_at(self) -> np.ndarray:
+        return self._received_at
+
+    @property
+    def pending_update_count(self) -> int:
+        return len(self._updated_instruments)
+
+    @property
+    def message_counts(self) -> np.ndarray:
+        """
+        Orderbook pushes received per instrument.
+        """
+        return self._message_counts
+
+    @property
+    def message_bytes(self) -> np.ndarray:
+        """
+        Orderbook push bytes received per instrument.
+        """
+        return self._message_bytes
+
+    def subscription_depth(self, instrument: str) -> int:
+        return self._subscription_depth.depth(self._indices[instrument]) if self._subscription_depth else 100
+
+    async def wait_for_updates(self, timeout: float) -> Set[str]:
+        """
+        Waits until at least one orderbook has changed and returns the instruments updated since the last call.
+        Returns an empty set if nothing changed before the timeout.
+        """
+        if not self._updated_instruments:
+            # asyncio.wait instead of wait_for since wait_for can swallow a cancellation that races with the event being set
+            waiter = asyncio.ensure_future(self._updates_available.wait())
+            try:
+                await asyncio.wait((waiter,), timeout=timeout)
+            finally:
+                waiter.cancel()
+        return self.take_updates()
+
+    def take_updates(self) -> Set[str]:
+        """
+        Returns the instruments updated since the last call without waiting.
+        """
+        self._updates_available.clear()
+        updated_instruments, self._updated_instruments = self._updated_instruments, set()
+        return updated_instruments
+
+    def _on_message(self, payload: str, message_size: int):
+        # the f-string would format the whole push even with debug logging off
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Received push {payload}")
+        update = decode_orderbook_push(payload)
+        index = self._order_books.update_from(update)
+        if index is not None:
+            self._updated_instruments.add(update.instrument_name)
+            self._updates_available.set()
+            self._message_counts[index] += 1
+            self._message_bytes[index] += message_size
+            if self._subscription_depth:
+                new_depth = self._subscription_depth.observe(index, self._order_books.bids_at(index)[1], self._order_books.asks_at(index)[1])
+                if new_depth is not None:
+                    task = asyncio.create_task(self._resubscribe(index, new_depth))
+                    self._resubscribe_tasks.add(task)
+                    task.add_done_callback(self._resubscribe_tasks.discard)
+            if self._metrics_enabled:
+                received_at = self._clock.time()
+                self._received_at[index] = received_at
+                self._exchange_to_receive.observe(received_at - update.timestamp / 1000)
+
+    async def _resubscribe(self, index: int, depth: int):
+        """
+        Moves an instrument to the channel with the given depth, subscribing to the new channel before leaving the old one so no update is missed.
+        """
+        old_channel = self._channels[index]
+        new_channel = self._channel(self._instruments[index], depth)
+        logger.info(f"Moving {self._instruments[index]} from {old_channel} to {new_channel}")
+        self._channels[index] = new_channel
+        self._channels_to_leave.add(old_channel)
         try:
-            while True:
-                response = json.loads(await self._ws.recv())
-                logger.debug(f"Received response {response}")
-                self._instrument_results[response["params"]["data"]["instrument_name"]] = response
-        finally:
-            self._subscription_task.cancel()
-            await self._ws.close()
+            await self._rpc_client.subscribe([new_channel], self._on_message, raw=True)
+        except Exception:
+            logger.exception(f"Failed to subscribe to {new_channel}, staying on {old_channel}")
+            self._channels[index] = old_channel
+            self._channels_to_leave.discard(old_channel)
+            self._subscription_depth.set_depth(index, int(old_channel.rsplit(".", 1)[1]))
+            return
+        await self._rpc_client.unsubscribe([old_channel])
+        self._channels_to_leave.discard(old_channel)
+
+    @staticmethod
+    def _channel(instrument: str, depth: int) -> str:
+        # channels look like orderbook.{instrument_name}.{group}.{depth}
+        return f"orderbook.{instrument}.1.{depth}"
@@ -0,0 +1,82 @@
+import logging
+from typing import Dict, List
+
+import numpy as np
+from lyra.connection_pool import ConnectionPool
+from lyra.rpc_client import RpcClient
+from utils.clock import Clock
+
+logger = logging.getLogger(__name__)
+
+
+class TickerCache:
+    """
+    Keeps a live cache of forward price, delta and mark IV per instrument fed by Lyra's ticker channels.
+    Readers call refresh_stale before reading so anything older than max_staleness_seconds is fetched
+    with public/get_ticker calls, pipelined on the RPC client, instead of being used stale.
+    """
+    def __init__(self, instruments: List[str], rpc_client: RpcClient | ConnectionPool, clock: Clock = Clock(), max_staleness_seconds: float = 5.0, interval_millis: int = 1000):
+        self._names = instruments
+        self._indices: Dict[str, int] = {instrument: index for index, instrument in enumerate(instruments)}
+        self._rpc_client = rpc_client
+        self._clock = clock
+        self._channels = [f"ticker.{instrument}.{interval_millis}" for instrument in instruments]
+        self._max_staleness_seconds = max_staleness_seconds
+        self._forward_prices = np.zeros(len(instruments))
+        self._deltas = np.zeros(len(instruments))
+        self._mark_ivs = np.zeros(len(instruments))
+        # local receive time in seconds, zero until the first ticker arrives
+        self._updated_at = np.zeros(len(instruments))
+
+    async def subscribe(self):
+        await self._rpc_client.subscribe(self._channels, self._on_message)
+
+    async def close(self):
+        await self._rpc_client.unsubscribe(self._channels)
+
+    async def refresh_stale(self, instruments: List[str]):
+        """
+        Fetches tickers for the instruments whose cached values are missing or older than the staleness bound.
+        """
+        await self.refresh_stale_at(np.array([self._indices[instrument] for instrument in instruments], dtype=np.int64))
+
+    async def refresh_stale_at(self, indices: np.ndarray):
+        oldest_allowed = self._clock.time() - self._max_staleness_seconds
+        stale_instruments = [self._names[index] for index in indices[self._updated_at[indices] < oldest_allowed]]
+        if not stale_instruments:
+            return
+        logger.debug(f"Tickers for {stale_instruments} are stale, fetching them directly")
+        tickers = await self._rpc_client.call_many("public/get_ticker", [{"instrument_name": instrument} for instrument in stale_instruments])
+        for instrument, ticker in zip(stale_instruments, tickers):
+            self.update(instrument, ticker["result"]["option_pricing"])
+
+    def update(self, instrument: str, option_pricing: Dict):
+        index = self._indices.get(instrument)
+        if index is None:
+            return
+        self._forward_prices[index] = float(option_pricing["forward_price"])
+        self._deltas[index] = float(option_pricing["delta"])
+        self._mark_ivs[index] = float(option_pricing["iv"])
+        self._updated_at[index] = self._clock.time()
+
+    @property
+    def forward_prices(self) -> np.ndarray:
+        return self._forward_prices
+
+    @property
+    def deltas(self) -> np.ndarray:
+        return self._deltas
+
+    def forward_price(self, instrument: str) -> float:
+        return float(self._forward_prices[self._indices[instrument]])
+
+    def delta(self, instrument: str) -> float:
+        return float(self._deltas[self._indices[instrument]])
+
+    def mark_iv(self, instrument: str) -> float:
+        return float(self._mark_ivs[self._indices[instrument]])
+
+    def _on_message(self, response: Dict, message_size: int):
+        # channels look like ticker.{instrument_name}.{interval}
+        instrument_name = response["params"]["channel"].split(".")[1]
+        self.update(instrument_name, response["params"]["data"]["instrument_ticker"]["option_pricing"])
@@ -3,39 +3,148 @@ import asyncio
 import json
 import logging
 import sys
-
-import websockets
+from typing import Dict, List, Tuple
 
 import instrument_monitor
+from lyra import push_decoder
+from lyra.connection_pool import ConnectionPool
 from lyra.constants import LYRA_WEBSOCKET_URI
-from telegram_client.telegram_client import TelegramClient
+from lyra.recording import Recorder
+from lyra.replay_client import ReplayClient
+from telegram_client.alert_dispatcher import AlertDispatcher
+from telegram_client.telegram_client import LoggingTelegramClient, TelegramClient
+from utils import black76, parallel_evaluation
+from utils.clock import Clock, VirtualClock
+from utils.metrics import NULL_METRICS, Metrics, resident_memory_bytes
 
 logging.basicConfig(format="%(asctime)s,%(msecs)03d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s",
                     datefmt="%Y-%m-%d:%H:%M:%S", level=logging.INFO)
 
 
 async def run_monitor(arguments):
-    async with websockets.connect(LYRA_WEBSOCKET_URI) as ws:
-        print(arguments)
-        get_instruments_message = {"id": "1", "method": "public/get_instruments",
-                                   "params": {"currency": "ETH", "expired": False, "instrument_type": "option"}}
-        await ws.send(json.dumps(get_instruments_message))
-        response = json.loads(await ws.recv())
-        instruments = list(filter(lambda instrument: arguments.expiry_date in instrument["instrument_name"], response["result"]))
-        telegram_client = TelegramClient(arguments.telegram_key, arguments.telegram_chat_id)
-        monitor = instrument_monitor.InstrumentMonitor(instruments, arguments.spread_limit, arguments.depth, arguments.delta, telegram_client)
-        await monitor.start_monitor()
+    # compiling the Black-76 kernels, or loading them from numba's cache, runs in a thread while we connect and subscribe
+    jit_warmup = asyncio.create_task(asyncio.to_thread(_warmup_jit, arguments.evaluation_mode))
+    metrics = Metrics() if arguments.metrics_port else NULL_METRICS
+    metrics_server, event_loop_lag_task, recorder = None, None, None
+    if arguments.metrics_port:
+        metrics_server = await metrics.serve(arguments.metrics_port)
+        event_loop_lag_task = asyncio.create_task(metrics.monitor_event_loop_lag())
+        metrics.gauge("process_resident_memory_bytes", "Resident memory of the monitor process", resident_memory_bytes)
+    try:
+        if arguments.replay_file:
+            clock = VirtualClock()
+            connection = ReplayClient(arguments.replay_file, clock, arguments.replay_speed)
+        else:
+            clock = Clock()
+            recorder = Recorder(arguments.record_file) if arguments.record_file else None
+            connection = ConnectionPool(arguments.ws_uri, max_connections=arguments.max_connections, max_channels_per_connection=arguments.max_channels_per_connection,
+                                        max_in_flight=arguments.max_in_flight, timeout_seconds=arguments.rpc_timeout,
+                                        recorder=recorder, metrics=metrics)
+        async with connection:
+            print(arguments)
+            responses = await connection.call_many("public/get_instruments", [
+                {"currency": currency, "expired": False, "instrument_type": "option"} for currency in arguments.currency])
+            instruments_by_expiry = _group_instruments_by_expiry([instrument for response in responses for instrument in response["result"]], arguments.expiry_date)
+            monitor_overrides = _load_monitor_overrides(arguments.monitors_config)
+            telegram_client = TelegramClient(arguments.telegram_key, arguments.telegram_chat_id, metrics) if arguments.telegram_key else LoggingTelegramClient()
+            alert_dispatcher = AlertDispatcher(telegram_client, cooldown_seconds=arguments.alert_cooldown, clock=clock)
+            alert_dispatcher.start()
+            monitors = []
+            for (currency, expiry_date), instruments in sorted(instruments_by_expiry.items()):
+                overrides = monitor_overrides.get((currency, expiry_date), {})
+                logging.info(f"Monitoring {len(instruments)} instruments for {currency} expiring on {expiry_date}")
+                monitors.append(instrument_monitor.InstrumentMonitor(instruments, _resolve_tiers(overrides, arguments), overrides.get("delta", arguments.delta), alert_dispatcher,
+                                                                     connection, clock, metrics, evaluation_mode=arguments.evaluation_mode))
+            # each monitor returns on its own once its expiry passes, unsubscribing only its own instruments
+            monitor_tasks = asyncio.gather(*(monitor.start_monitor(jit_warmup) for monitor in monitors))
+            if arguments.replay_file:
+                await asyncio.gather(*(monitor.wait_until_subscribed() for monitor in monitors))
+                connection.start()
+                await connection.wait_until_finished()
+                monitor_tasks.cancel()
+                await asyncio.gather(monitor_tasks, return_exceptions=True)
+            else:
+                await monitor_tasks
+            await alert_dispatcher.close()
+    finally:
+        if recorder:
+            recorder.close()
+        if event_loop_lag_task:
+            event_loop_lag_task.cancel()
+        if metrics_server:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+
+
+def _warmup_jit(evaluation_mode: str):
+    black76.warmup_jit()
+    push_decoder.warmup_jit()
+    if evaluation_mode == "parallel":
+        parallel_evaluation.warmup_jit()
+
+
+def _group_instruments_by_expiry(instruments: List[Dict], expiry_dates: List[str] | None) -> Dict[Tuple[str, str], List[Dict]]:
+    instruments_by_expiry = {}
+    for instrument in instruments:
+        # instrument names look like ETH-20240329-3000-C
+        currency, expiry_date = instrument["instrument_name"].split("-")[:2]
+        if not expiry_dates or expiry_date in expiry_dates:
+            instruments_by_expiry.setdefault((currency, expiry_date), []).append(instrument)
+    return instruments_by_expiry
+
+
+def _resolve_tiers(overrides: Dict, arguments) -> List[Tuple[float, float]]:
+    """
+    Picks the (depth, spread limit) tiers for one monitor. A monitor's own tiers or depth and spread limit win over --tiers,
+    which wins over --depth and --spread_limit.
+    """
+    if "tiers" in overrides:
+        return [(depth, spread_limit) for depth, spread_limit in overrides["tiers"]]
+    if "depth" in overrides or "spread_limit" in overrides or not arguments.tiers:
+        return [(overrides.get("depth", arguments.depth), overrides.get("spread_limit", arguments.spread_limit))]
+    return arguments.tiers
+
+
+def _parse_tier(value: str) -> Tuple[float, float]:
+    depth, spread_limit = value.split(":")
+    return float(depth), float(spread_limit)
+
+
+def _load_monitor_overrides(path: str | None) -> Dict[Tuple[str, str], Dict]:
+    """
+    Reads per expiry thresholds from a JSON list like [{"currency": "BTC", "expiry_date": "20240329", "spread_limit": .05}].
+    Tiers are given as a list of [depth, spread_limit] pairs. Any threshold left out falls back to the command line value.
+    """
+    if not path:
+        return {}
+    with open(path) as config_file:
+        return {(config.pop("currency"), config.pop("expiry_date")): config for config in json.load(config_file)}
 
 
 def main():
     print(f"{sys.argv}")
-    parser = argparse.ArgumentParser(description="Monitor instruments for a given expiry date")
-    parser.add_argument("--expiry_date", type=str, default="20240329", help="The expiry date for options to monitor")
+    parser = argparse.ArgumentParser(description="Monitor instruments for the given currencies and expiry dates")
+    parser.add_argument("--currency", type=str, nargs="+", default=["ETH"], help="The currencies for options to monitor")
+    parser.add_argument("--expiry_date", type=str, nargs="*", help="The expiry dates for options to monitor, every listed expiry if left out")
+    parser.add_argument("--monitors_config", type=str, help="A JSON file with delta, spread_limit and depth overrides per currency and expiry date")
     parser.add_argument("--delta", type=float, default=.03, help="The black-scholes delta threshold")
     parser.add_argument("--spread_limit", type=float, default=.03, help="The spread limit for alerts")
     parser.add_argument("--depth", type=float, default=100, help="The depth for calculating the price")
+    parser.add_argument("--tiers", type=_parse_tier, nargs="+", help="Depths to watch with their own spread limits, e.g. 1:.05 5:.07, instead of --depth and --spread_limit")
     parser.add_argument("--telegram_key", type=str, help="The telegram key for sending alerts")
     parser.add_argument("--telegram_chat_id", type=int, default=-1002075187090, help="The telegram chat id for sending alerts")
+    parser.add_argument("--ws_uri", type=str, default=LYRA_WEBSOCKET_URI, help="The Lyra websocket endpoint, e.g. a local exchange simulator for load testing")
+    parser.add_argument("--max_in_flight", type=int, default=64, help="The maximum number of concurrent requests on the Lyra websocket")
+    parser.add_argument("--rpc_timeout", type=float, default=10.0, help="The timeout in seconds for each Lyra request")
+    parser.add_argument("--max_connections", type=int, default=8, help="The maximum number of websocket connections to Lyra")
+    parser.add_argument("--max_channels_per_connection", type=int, default=500, help="The maximum number of subscribed channels on one websocket connection")
+    parser.add_argument("--record_file", type=str, help="Append the Lyra traffic we receive to this recording file")
+    parser.add_argument("--replay_file", type=str, help="Replay a recording instead of connecting to Lyra")
+    parser.add_argument("--replay_speed", type=float, default=0.0, help="The replay speed as a multiple of real time, 0 replays as fast as possible")
+    parser.add_argument("--metrics_port", type=int, help="Serve latency metrics in the Prometheus text format on this local port, off if left out")
+    parser.add_argument("--alert_cooldown", type=float, default=1800, help="The number of seconds before the same alert for an instrument is sent again")
+    parser.add_argument("--evaluation_mode", type=str, choices=["single", "parallel"], default="single",
+                        help="Evaluate orderbooks on the event loop (single) or across numba threads outside it (parallel)")
     args = parser.parse_args()
     asyncio.run(run_monitor(args))
 
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+from telegram_client.telegram_client import LoggingTelegramClient, TelegramClient
+from utils.clock import Clock
+
+logger = logging.getLogger(__name__)
+
+
+class Alert:
+    """
+    One alert for one instrument. alert_type is what the alert is about (e.g. spread or liquidity) and is used for dedup,
+    header is the monitor's description of its thresholds that alerts are grouped under when they are merged.
+    A recovery says an earlier alert of the same type has cleared.
+    """
+    __slots__ = ("instrument_name", "alert_type", "message", "header", "recovery")
+
+    def __init__(self, instrument_name: str, alert_type: str, message: str, header: str, recovery: bool = False):
+        self.instrument_name = instrument_name
+        self.alert_type = alert_type
+        self.message = message
+        self.header = header
+        self.recovery = recovery
+
+
+class AlertDispatcher:
+    """
+    Sends alerts to telegram from a background task so a slow or throttled send never stalls orderbook evaluation.
+
+    Alerts go into a bounded queue that drops the oldest alert when full. The sender merges everything that arrives within
+    merge_window_seconds into one message per header, skips alerts for an instrument and alert type that were already sent
+    within cooldown_seconds unless they recovered since, keeps at least min_send_interval_seconds between sends and backs off when telegram asks it to.
+    """
+    _max_message_length = 4096
+
+    def __init__(self, telegram_client: TelegramClient | LoggingTelegramClient, max_queue_size: int = 1000, merge_window_seconds: float = 2.0,
+                 cooldown_seconds: float = 1800.0, min_send_interval_seconds: float = 3.0, max_retries: int = 5, clock: Clock = Clock()):
+        self._telegram_client = telegram_client
+        self._queue: asyncio.Queue[Alert] = asyncio.Queue(max_queue_size)
+        self._merge_window_seconds = merge_window_seconds
+        self._cooldown_seconds = cooldown_seconds
+        self._min_send_interval_seconds = min_send_interval_seconds
+        self._max_retries = max_retries
+        self._clock = clock
+        self._last_sent_at: Dict[Tuple[str, str], float] = {}
+        self._last_send_finished_at = 0.0
+        self._sender_task: asyncio.Task | None = None
+        # alerts taken off the queue and waiting out the merge window, and the batch being sent, so close can finish both
+        self._merging_alerts: List[Alert] = []
+        self._batch_in_flight: asyncio.Future | None = None
+        self._sent = 0
+        self._dropped = 0
+        self._suppressed = 0
+
+    @property
+    def sent(self) -> int:
+        return self._sent
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def suppressed(self) -> int:
+        return self._suppressed
+
+    def start(self):
+        self._sender_task = asyncio.create_task(self._send_alerts())
+
+    async def close(self):
+        """
+        Stops the sender, lets a batch that is already being sent finish and sends whatever is still waiting.
+        """
+        if self._sender_task:
+            self._sender_task.cancel()
+            await asyncio.gather(self._sender_task, return_exceptions=True)
+        if self._batch_in_flight:
+            await asyncio.gather(self._batch_in_flight, return_exceptions=True)
+        pending_alerts = self._merging_alerts + self._drain_queue()
+        self._merging_alerts = []
+        if pending_alerts:
+            await self._send_batch(pending_alerts)
+
+    def submit(self, alert: Alert):
+        """
+        Queues an alert without waiting. Under backpressure the oldest queued alert is dropped to make room.
+        """
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._dropped += 1
+            logger.warning(f"Alert queue is full, dropped the oldest alert ({self._dropped} dropped so far)")
+        self._queue.put_nowait(alert)
+
+    async def _send_alerts(self):
+        while True:
+            self._merging_alerts = [await self._queue.get()]
+            # give other alerts from the same evaluation burst a chance to land in the same message
+            await asyncio.sleep(self._merge_window_seconds)
+            alerts, self._merging_alerts = self._merging_alerts + self._drain_queue(), []
+            # shielded so close can wait for a send in progress instead of cutting it off
+            self._batch_in_flight = asyncio.ensure_future(self._send_batch(alerts))
+            try:
+                await asyncio.shield(self._batch_in_flight)
+            except Exception:
+                # anything unexpected costs this batch, never the sender, or every later alert would sit in the queue
+                logger.exception(f"Failed to send a batch of {len(alerts)} alerts")
+
+    def _drain_queue(self) -> List[Alert]:
+        alerts = []
+        while not self._queue.empty():
+            alerts.append(self._queue.get_nowait())
+        return alerts
+
+    async def _send_batch(self, alerts: List[Alert]):
+        now = self._clock.time()
+        # later alerts for the same instrument and type replace earlier ones
+        latest_alerts = {(alert.instrument_name, alert.alert_type): alert for alert in alerts}
+        alerts_by_header: Dict[str, List[Alert]] = {}
+        for key, alert in latest_alerts.items():
+            if alert.recovery:
+                # a recovery lifts the cooldown so the next breach alerts again, and is only worth sending if its alert went out
+                if self._last_sent_at.pop(key, None) is None:
+                    continue
+            elif now - self._last_sent_at.get(key, float("-inf")) < self._cooldown_seconds:
+                self._suppressed += 1
+                continue
+            alerts_by_header.setdefault(alert.header, []).append(alert)
+        for header, header_alerts in alerts_by_header.items():
+            lines = sorted(f"{alert.instrument_name}: {alert.message}" for alert in header_alerts)
+            sent_all = True
+            for message in self._split_message(header, lines):
+                if await self._send_with_backoff(message):
+                    self._sent += 1
+                else:
+                    sent_all = False
+            if sent_all:
+                for alert in header_alerts:
+                    if alert.recovery:
+                        continue
+                    self._last_sent_at[(alert.instrument_name, alert.alert_type)] = now
+
+    def _split_message(self, header: str, lines: List[str]) -> List[str]:
+        messages, message = [], header
+        for line in lines:
+            if len(message) + len(line) + 1 > self._max_message_length:
+                messages.append(message)
+                message = header
+            message += "\n" + line
+        messages.append(message)
+        return messages
+
+    async def _send_with_backoff(self, message: str) -> bool:
+        # telegram is slow to import and only needed once there is something to send
+        import telegram.error
+
+        backoff_seconds = 1.0
+        for attempt in range(self._max_retries):
+            wait_seconds = self._last_send_finished_at + self._min_send_interval_seconds - time.monotonic()
+            if wait_seconds > 0:
+                await asyncio.sleep(wait_seconds)
+            try:
+                await self._telegram_client.send_message(message)
+                return True
+            except telegram.error.RetryAfter as error:
+                retry_after = error.retry_after
+                backoff_seconds = retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+                logger.warning(f"Telegram asked us to slow down, retrying in {backoff_seconds} seconds")
+            except telegram.error.BadRequest as error:
+                # a NetworkError subclass, but the same message would be rejected again
+                logger.error(f"Telegram rejected the alert, not retrying: {error}\n{message}")
+                return False
+            except (telegram.error.TimedOut, telegram.error.NetworkError) as error:
+                logger.warning(f"Failed to send alert on attempt {attempt + 1}: {error}")
+            except telegram.error.TelegramError as error:
+                # e.g. Forbidden when the bot was removed from the chat or InvalidToken, which retrying can't fix
+                logger.error(f"Failed to send alert, not retrying: {error!r}\n{message}")
+                return False
+            finally:
+                self._last_send_finished_at = time.monotonic()
+            await asyncio.sleep(backoff_seconds)
+            backoff_seconds = min(backoff_seconds * 2, 60.0)
+        logger.error(f"Giving up on sending alert after {self._max_retries} attempts:\n{message}")
+        return False
@@ -1,10 +1,24 @@
-import telegram
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from utils.metrics import NULL_METRICS, Metrics, NullMetrics
+
+if TYPE_CHECKING:
+    import telegram
+
+logger = logging.getLogger(__name__)
 
 
 class TelegramClient:
-    def __init__(self, token: str, chat_id: str):
+    def __init__(self, token: str, chat_id: str, metrics: Metrics | NullMetrics = NULL_METRICS):
+        # imported here so runs without a bot never pay for importing telegram
+        import telegram
+
         self._bot = telegram.Bot(token=token)
         self._chat_id = chat_id
+        self._metrics_enabled = metrics.enabled
+        self._send_duration = metrics.histogram("telegram_send_seconds", "Time taken to send an alert to telegram")
 
     """
     Sends a particular message to a telegram chat.
@@ -12,5 +26,19 @@ class TelegramClient:
     Therefore, we cannot retrieve every chat that this bot is added to and assume it is safe to send a message.
     Unfortunately, we must tell the bot which chats it can use for now.
     """
-    async def send_message(self, message: str) -> telegram.Message:
-        return await self._bot.send_message(self._chat_id, message)
+    async def send_message(self, message: str) -> "telegram.Message":
+        if not self._metrics_enabled:
+            return await self._bot.send_message(self._chat_id, message)
+        started_at = time.perf_counter()
+        try:
+            return await self._bot.send_message(self._chat_id, message)
+        finally:
+            self._send_duration.observe(time.perf_counter() - started_at)
+
+
+class LoggingTelegramClient:
+    """
+    Drop in for TelegramClient that logs alerts instead of sending them, for replays and local runs without a bot.
+    """
+    async def send_message(self, message: str) -> None:
+        logger.info(f"Alert that would have been sent to telegram:\n{message}")
@@ -0,0 +1,55 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class BreachTracker:
+    """
+    Tracks when each instrument started breaching a condition and whether we have alerted on it yet.
+    An instrument alerts once it has breached for persistence_millis, and recovers the first time it is seen within the condition after that.
+    Breach start times live in an array indexed by instrument table row, so updating a row is O(1) and nothing resets on a timer.
+    """
+    _not_breaching = -1
+
+    def __init__(self, instrument_count: int, persistence_millis: int = 60000):
+        self._persistence_millis = persistence_millis
+        self._breach_started_at = np.full(instrument_count, self._not_breaching, dtype=np.int64)
+        self._alerted = np.zeros(instrument_count, dtype=bool)
+
+    @property
+    def breach_started_at(self) -> np.ndarray:
+        return self._breach_started_at
+
+    @property
+    def alerted(self) -> np.ndarray:
+        return self._alerted
+
+    def update(self, indices: np.ndarray, breaching: np.ndarray, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Records whether each of the given rows is breaching as of its timestamp. indices must be unique.
+        Returns the rows that should alert now and the rows that recovered from an alerted breach.
+        """
+        breach_started_at = self._breach_started_at[indices]
+        alerted = self._alerted[indices]
+        breach_started_at = np.where(breaching & (breach_started_at == self._not_breaching), timestamps, breach_started_at)
+        breach_started_at[~breaching] = self._not_breaching
+        recovered = ~breaching & alerted
+        should_alert = breaching & ~alerted & (timestamps - breach_started_at >= self._persistence_millis)
+        self._breach_started_at[indices] = breach_started_at
+        self._alerted[indices] = (alerted & breaching) | should_alert
+        return indices[should_alert], indices[recovered]
+
+    def due(self, current_epoch_milli: int) -> np.ndarray:
+        """
+        Returns the rows whose breach has now lasted long enough to alert even though their book has not changed since, and marks them alerted.
+        """
+        due_indices = np.flatnonzero((self._breach_started_at != self._not_breaching) & ~self._alerted & (current_epoch_milli - self._breach_started_at >= self._persistence_millis))
+        self._alerted[due_indices] = True
+        return due_indices
+
+    def reset(self, mask: np.ndarray):
+        """
+        Forgets the breach state of the masked rows without recovering them, e.g. once they are no longer monitored.
+        """
+        self._breach_started_at[mask] = self._not_breaching
+        self._alerted[mask] = False
@@ -0,0 +1,23 @@
+import time
+
+
+class Clock:
+    """
+    Wall clock in epoch seconds. Everything on the hot path reads time through a clock so replays can swap in a VirtualClock.
+    """
+    def time(self) -> float:
+        return time.time()
+
+
+class VirtualClock(Clock):
+    """
+    Clock that only moves when the replay advances it to the timestamp of the message being played back.
+    """
+    def __init__(self, start_time: float = 0.0):
+        self._current_time = start_time
+
+    def time(self) -> float:
+        return self._current_time
+
+    def advance_to(self, current_time: float):
+        self._current_time = max(self._current_time, current_time)
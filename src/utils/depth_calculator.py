@@ -1,5 +1,7 @@
 from typing import List, Tuple
 
+import numpy as np
+
 """
 This function assumes that the orders are already sorted by price.
 For bids, the orders are sorted in descending order by price (first index)
@@ -16,3 +18,44 @@ def calculate_depth_price(depth: float, orders: List[List[str]]) -> Tuple[float,
         depth_used += depth_needed
     total_price = total_price / depth_used if depth_used > 0 else 0
     return total_price, depth_used
+
+
+"""
+Array version of calculate_depth_price for books that were already parsed into float64 price and volume arrays.
+The same ordering assumptions apply. The cutoff level is found with a searchsorted over the cumulative volume.
+"""
+def calculate_depth_price_from_arrays(depth: float, prices: np.ndarray, volumes: np.ndarray) -> Tuple[float, float]:
+    if prices.shape[0] == 0:
+        return 0, 0
+    cumulative_volumes = np.cumsum(volumes)
+    cutoff = int(np.searchsorted(cumulative_volumes, depth))
+    if cutoff >= cumulative_volumes.shape[0]:
+        depth_used = float(cumulative_volumes[-1])
+        total_price = float(np.dot(prices, volumes))
+    else:
+        depth_used = depth
+        volume_before_cutoff = cumulative_volumes[cutoff - 1] if cutoff > 0 else 0.0
+        total_price = float(np.dot(prices[:cutoff], volumes[:cutoff]) + prices[cutoff] * (depth - volume_before_cutoff))
+    total_price = total_price / depth_used if depth_used > 0 else 0
+    return total_price, depth_used
+
+
+"""
+Multi-depth version of calculate_depth_price_from_arrays that prices every depth in depths with one cumulative pass over the side.
+Returns the price and filled volume per depth, in the same order as depths.
+"""
+def calculate_depth_prices_from_arrays(depths: np.ndarray, prices: np.ndarray, volumes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    level_count = prices.shape[0]
+    if level_count == 0:
+        return np.zeros(depths.shape[0]), np.zeros(depths.shape[0])
+    # a leading zero so index i holds the volume and notional of the first i levels
+    cumulative_volumes = np.zeros(level_count + 1)
+    cumulative_notionals = np.zeros(level_count + 1)
+    np.cumsum(volumes, out=cumulative_volumes[1:])
+    np.cumsum(prices * volumes, out=cumulative_notionals[1:])
+    cutoffs = np.minimum(np.searchsorted(cumulative_volumes[1:], depths), level_count)
+    depths_used = np.minimum(depths, cumulative_volumes[-1])
+    # the cutoff level only fills what is left after the levels before it, and nothing when every level is used up
+    cutoff_prices = np.append(prices, 0.0)[cutoffs]
+    total_prices = cumulative_notionals[cutoffs] + cutoff_prices * (depths_used - cumulative_volumes[cutoffs])
+    return np.divide(total_prices, depths_used, out=np.zeros(depths.shape[0]), where=depths_used > 0), depths_used
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Tuple
+
+import numpy as np
+
+from utils.black76 import iv_from_b76_prices_warm
+
+
+class IvCache:
+    """
+    Memoizes solved IVs per instrument and side, keyed on price, forward and a quantized time to expiry,
+    with LRU eviction once max_size entries are stored.
+    Misses are solved in one batch warm-started from the last IV solved for that instrument and side,
+    which barely moves between passes, so steady state solves should only need one or two iterations.
+    """
+    _seconds_per_year = 365 * 24 * 60 * 60
+
+    def __init__(self, instrument_count: int, max_size: int = 100_000, tau_quantum_seconds: float = 60.0):
+        self._max_size = max_size
+        self._tau_quantum_years = tau_quantum_seconds / self._seconds_per_year
+        self._entries: OrderedDict[Tuple[int, int, float, float, int], float] = OrderedDict()
+        # columns are bid (0) and ask (1)
+        self._last_ivs = np.zeros((instrument_count, 2))
+        self._hits = 0
+        self._misses = 0
+        self._iterations = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def iterations(self) -> int:
+        return self._iterations
+
+    @property
+    def average_iterations(self) -> float:
+        return self._iterations / self._misses if self._misses else 0.0
+
+    @property
+    def last_ivs(self) -> np.ndarray:
+        """
+        The last IV solved per instrument row, with bid (0) and ask (1) columns.
+        """
+        return self._last_ivs
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record_solves(self, indices: np.ndarray, ivs: np.ndarray, iterations: np.ndarray):
+        """
+        Records (bid, ask) IVs solved outside the cache for the given rows, so later solves warm start from them and the stats count them as misses.
+        """
+        self._last_ivs[indices] = ivs
+        self._misses += ivs.size
+        self._iterations += int(iterations.sum())
+
+    def solve(self, indices: np.ndarray, sides: np.ndarray, premium_prices: np.ndarray, strikes: np.ndarray, taus: np.ndarray,
+              forward_prices: np.ndarray, is_calls: np.ndarray) -> np.ndarray:
+        """
+        Returns the IVs for every row, solving only the rows that are not cached yet.
+        """
+        ivs = np.zeros(premium_prices.shape[0])
+        keys = list(zip(indices.tolist(), sides.tolist(), premium_prices.tolist(), forward_prices.tolist(), np.rint(taus / self._tau_quantum_years).astype(np.int64).tolist()))
+        missing_rows = []
+        for row, key in enumerate(keys):
+            iv = self._entries.get(key)
+            if iv is None:
+                missing_rows.append(row)
+            else:
+                self._entries.move_to_end(key)
+                ivs[row] = iv
+        self._hits += len(keys) - len(missing_rows)
+        if not missing_rows:
+            return ivs
+
+        missing_rows = np.array(missing_rows, dtype=np.int64)
+        missing_indices, missing_sides = indices[missing_rows], sides[missing_rows]
+        solved_ivs, iterations = iv_from_b76_prices_warm(premium_prices[missing_rows], strikes[missing_rows], taus[missing_rows], forward_prices[missing_rows],
+                                                         is_calls[missing_rows], self._last_ivs[missing_indices, missing_sides])
+        ivs[missing_rows] = solved_ivs
+        self._last_ivs[missing_indices, missing_sides] = solved_ivs
+        self._misses += missing_rows.size
+        self._iterations += int(iterations.sum())
+        for row, iv in zip(missing_rows.tolist(), solved_ivs.tolist()):
+            self._entries[keys[row]] = iv
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return ivs
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+"""
+Low overhead latency histograms and gauges served in the Prometheus text format.
+
+Everything is off by default: components take NULL_METRICS unless main enables a Metrics registry,
+and they skip their timing code entirely when metrics.enabled is False.
+"""
+
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    __slots__ = ("_name", "_help", "_bounds", "_counts", "_sum")
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self._name = name
+        self._help = help_text
+        self._bounds = np.array(buckets)
+        # the last bucket is +Inf
+        self._counts = np.zeros(len(buckets) + 1, dtype=np.int64)
+        self._sum = 0.0
+
+    def observe(self, value: float):
+        self._counts[np.searchsorted(self._bounds, value)] += 1
+        self._sum += value
+
+    def observe_many(self, values: np.ndarray):
+        self._counts += np.bincount(np.searchsorted(self._bounds, values), minlength=self._counts.size)
+        self._sum += float(values.sum())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self._name} {self._help}", f"# TYPE {self._name} histogram"]
+        cumulative_counts = np.cumsum(self._counts)
+        for bound, count in zip(self._bounds, cumulative_counts):
+            lines.append(f'{self._name}_bucket{{le="{bound:g}"}} {count}')
+        lines.append(f'{self._name}_bucket{{le="+Inf"}} {cumulative_counts[-1]}')
+        lines.append(f"{self._name}_sum {self._sum}")
+        lines.append(f"{self._name}_count {cumulative_counts[-1]}")
+        return lines
+
+
+class _NullHistogram:
+    def observe(self, value: float):
+        pass
+
+    def observe_many(self, values: np.ndarray):
+        pass
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Dict[str, Callable[[], float]]] = {}
+        self._gauge_help: Dict[str, str] = {}
+
+    def histogram(self, name: str, help_text: str) -> Histogram:
+        """
+        Returns the histogram with this name, creating it the first time so components can share it.
+        """
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, help_text)
+        return self._histograms[name]
+
+    def gauge(self, name: str, help_text: str, read_value: Callable[[], float], labels: Dict[str, str] | None = None):
+        """
+        Registers a gauge that is only read when the metrics are scraped.
+        """
+        label_text = ",".join(f'{key}="{value}"' for key, value in (labels or {}).items())
+        self._gauges.setdefault(name, {})[label_text] = read_value
+        self._gauge_help[name] = help_text
+
+    def remove_gauges(self, labels: Dict[str, str]):
+        label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        for gauges in self._gauges.values():
+            gauges.pop(label_text, None)
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        for name, gauges in self._gauges.items():
+            lines.extend([f"# HELP {name} {self._gauge_help[name]}", f"# TYPE {name} gauge"])
+            for label_text, read_value in gauges.items():
+                lines.append(f"{name}{{{label_text}}} {read_value()}" if label_text else f"{name} {read_value()}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, port: int, host: str = "127.0.0.1") -> asyncio.AbstractServer:
+        """
+        Serves render() to any HTTP request on host:port.
+        """
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+                body = self.render().encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\nContent-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+                await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+    async def monitor_event_loop_lag(self, interval_seconds: float = 0.5):
+        """
+        Measures how late the event loop wakes us up after each sleep, which is time it spent busy elsewhere.
+        """
+        lag = self.histogram("event_loop_lag_seconds", "How late the event loop ran a sleeping task")
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(interval_seconds)
+            lag.observe(max(0.0, time.perf_counter() - started_at - interval_seconds))
+
+
+def resident_memory_bytes() -> float:
+    """
+    The current resident memory of this process, read from /proc so it is only available on Linux. NaN anywhere else.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return float(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except OSError:
+        return float("nan")
+
+
+class NullMetrics:
+    enabled = False
+
+    def histogram(self, name: str, help_text: str) -> _NullHistogram:
+        return _NullHistogram()
+
+    def gauge(self, name: str, help_text: str, read_value: Callable[[], float], labels: Dict[str, str] | None = None):
+        pass
+
+    def remove_gauges(self, labels: Dict[str, str]):
+        pass
+
+
+NULL_METRICS = NullMetrics()
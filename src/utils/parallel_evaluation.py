@@ -0,0 +1,93 @@
+import os
+import threading
+from typing import Tuple
+
+import numba
+import numpy as np
+from numba import njit, prange
+
+from utils.black76 import _iv_from_b76_price_warm
+
+"""
+Evaluates a batch of parsed orderbooks across numba's worker threads.
+The kernel releases the GIL, so running it in a thread leaves the event loop free to keep reading websockets while it works.
+"""
+
+# the workqueue layer can't run two parallel kernels at once, and every monitor shares it
+_kernel_lock = threading.Lock()
+_threading_layer_chosen = False
+
+
+@njit(cache=True, nogil=True)
+def _depth_prices(depths: np.ndarray, prices: np.ndarray, volumes: np.ndarray, count: int, depth_prices: np.ndarray, depths_used: np.ndarray):
+    """
+    Same as depth_calculator.calculate_depth_prices_from_arrays over the first count levels, writing into depth_prices and depths_used.
+    depths must be ascending so every depth is priced in the same walk over the levels.
+    """
+    volume_before = 0.0
+    notional_before = 0.0
+    tier = 0
+    for level in range(count):
+        volume_after = volume_before + volumes[level]
+        while tier < depths.shape[0] and depths[tier] <= volume_after:
+            depths_used[tier] = depths[tier]
+            total_price = notional_before + prices[level] * (depths[tier] - volume_before)
+            depth_prices[tier] = total_price / depths[tier] if depths[tier] > 0 else 0.0
+            tier += 1
+        volume_before = volume_after
+        notional_before += prices[level] * volumes[level]
+    for remaining_tier in range(tier, depths.shape[0]):
+        depths_used[remaining_tier] = volume_before
+        depth_prices[remaining_tier] = notional_before / volume_before if volume_before > 0 else 0.0
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _evaluate_books(depths: np.ndarray, bid_prices: np.ndarray, bid_volumes: np.ndarray, bid_counts: np.ndarray, ask_prices: np.ndarray, ask_volumes: np.ndarray,
+                    ask_counts: np.ndarray, strikes: np.ndarray, taus: np.ndarray, forward_prices: np.ndarray, is_calls: np.ndarray,
+                    initial_guesses: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    count, tier_count = bid_counts.shape[0], depths.shape[0]
+    depth_volumes = np.zeros((count, tier_count, 2))
+    ivs = np.zeros((count, tier_count, 2))
+    iterations = np.zeros((count, tier_count, 2), dtype=np.int64)
+    for row in prange(count):
+        depth_prices = np.zeros((tier_count, 2))
+        _depth_prices(depths, bid_prices[row], bid_volumes[row], bid_counts[row], depth_prices[:, 0], depth_volumes[row, :, 0])
+        _depth_prices(depths, ask_prices[row], ask_volumes[row], ask_counts[row], depth_prices[:, 1], depth_volumes[row, :, 1])
+        for tier in range(tier_count):
+            for side in range(2):
+                ivs[row, tier, side], iterations[row, tier, side] = _iv_from_b76_price_warm(depth_prices[tier, side], strikes[row], taus[row], forward_prices[row], is_calls[row],
+                                                                                           initial_guesses[row, tier, side])
+    return depth_volumes, ivs, iterations
+
+
+def evaluate_books(depths: np.ndarray, bid_prices: np.ndarray, bid_volumes: np.ndarray, bid_counts: np.ndarray, ask_prices: np.ndarray, ask_volumes: np.ndarray,
+                   ask_counts: np.ndarray, strikes: np.ndarray, taus: np.ndarray, forward_prices: np.ndarray, is_calls: np.ndarray,
+                   initial_guesses: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Prices every row at each of the ascending depths on both sides and solves the bid and ask IVs, splitting rows across numba's threads.
+    Rows are books, so the caller passes copies of the rows it wants evaluated rather than the store's live arrays.
+    initial_guesses and the results are shaped (rows, depths, 2) with bid and ask in the last axis.
+    Returns the filled volumes, the IVs and the iterations used.
+    """
+    with _kernel_lock:
+        _choose_threading_layer()
+        return _evaluate_books(depths, bid_prices, bid_volumes, bid_counts, ask_prices, ask_volumes, ask_counts, strikes, taus, forward_prices, is_calls, initial_guesses)
+
+
+def _choose_threading_layer():
+    """
+    The kernel is launched from asyncio's worker threads, which hangs the TBB threading layer numba prefers when it is installed,
+    so the workqueue layer is used unless NUMBA_THREADING_LAYER chose one. This runs before the first launch rather than on import,
+    so the process-wide setting is left alone unless parallel evaluation is actually used.
+    """
+    global _threading_layer_chosen
+    if not _threading_layer_chosen:
+        if "NUMBA_THREADING_LAYER" not in os.environ:
+            numba.config.THREADING_LAYER = "workqueue"
+        _threading_layer_chosen = True
+
+
+def warmup_jit():
+    levels = np.ones((1, 1))
+    evaluate_books(np.ones(1), levels, levels, np.ones(1, dtype=np.int64), levels, levels, np.ones(1, dtype=np.int64), np.ones(1), np.ones(1), np.ones(1),
+                   np.array([True]), np.zeros((1, 1, 2)))
@@ -0,0 +1,29 @@
+import asyncio
+
+from benchmarks.exchange_simulator import ExchangeSimulator
+from lyra.connection_pool import ConnectionPool
+from lyra.push_decoder import decode_orderbook_push
+
+
+def test_serves_instruments_tickers_and_orderbooks_at_the_subscribed_depth():
+    async def run():
+        simulator = ExchangeSimulator(["ETH"], strike_count=3, expiry_count=1, message_rate=500)
+        await simulator.start()
+        pushes = []
+        try:
+            async with ConnectionPool(simulator.uri) as connection_pool:
+                instruments = (await connection_pool.call("public/get_instruments", {"currency": "ETH", "expired": False, "instrument_type": "option"}))["result"]
+                name = instruments[0]["instrument_name"]
+                ticker = (await connection_pool.call("public/get_ticker", {"instrument_name": name}))["result"]
+                await connection_pool.subscribe([f"orderbook.{name}.1.10"], lambda payload, message_size: pushes.append(decode_orderbook_push(payload)), raw=True)
+                while len(pushes) < 3:
+                    await asyncio.sleep(0.01)
+                await connection_pool.unsubscribe([f"orderbook.{name}.1.10"])
+        finally:
+            await simulator.close()
+        return instruments, ticker, pushes, name
+
+    instruments, ticker, pushes, name = asyncio.run(run())
+    assert len(instruments) == 6
+    assert float(ticker["option_pricing"]["forward_price"]) > 0
+    assert all(push.instrument_name == name and push.bids.shape == (10, 2) and push.asks.shape == (10, 2) for push in pushes)
@@ -0,0 +1,66 @@
+import asyncio
+import json
+from typing import List, Set, Tuple
+
+import numpy as np
+
+from instrument_monitor import InstrumentMonitor
+from lyra.subscription_listener import SubscriptionListener
+from lyra.ticker_cache import TickerCache
+from telegram_client.alert_dispatcher import Alert, AlertDispatcher
+from telegram_client.telegram_client import LoggingTelegramClient
+from tests.lyra.fakes import FakeRpcClient, orderbook_message
+from utils.clock import VirtualClock
+
+CALL = "ETH-20240329-3000-C"
+PUT = "ETH-20240329-3000-P"
+START = 1709251200
+EXPIRY = START + 30 * 24 * 60 * 60
+# an at the money option 30 days out is worth about 206 at 60% vol, so 150 and 260 are IVs far apart while 205 and 206 are within a percent
+WIDE_SIDES = ([["150", "20"]], [["260", "20"]])
+THIN_WIDE_SIDES = ([["150", "2"]], [["260", "2"]])
+TIGHT_SIDES = ([["205", "20"]], [["206", "20"]])
+
+
+def _alert_keys(alerts: List[Alert]) -> Set[Tuple[str, str, bool]]:
+    return {(alert.instrument_name, alert.alert_type, alert.recovery) for alert in alerts}
+
+
+def test_alerts_and_recoveries_are_decided_per_instrument_and_tier():
+    async def run():
+        clock = VirtualClock(START)
+        ticker = {"option_pricing": {"forward_price": "3000", "delta": "0.5", "iv": "0.6"}}
+        rpc_client = FakeRpcClient({CALL: ticker, PUT: ticker})
+        instruments = [{"instrument_name": name, "option_details": {"strike": "3000", "expiry": EXPIRY, "option_type": name[-1]}} for name in (CALL, PUT)]
+        # one side has to fill 1 for the first tier and 10 for the second
+        monitor = InstrumentMonitor(instruments, [(20, 0.05), (2, 0.05)], 0.03, AlertDispatcher(LoggingTelegramClient()), rpc_client, clock, poll_interval_seconds=0)
+        listener = SubscriptionListener(monitor.instrument_table.names, rpc_client, clock)
+        ticker_cache = TickerCache(monitor.instrument_table.names, rpc_client, clock)
+        await listener.subscribe()
+        instruments_to_check = np.ones(len(monitor.instrument_table), dtype=bool)
+
+        async def alerts_at(seconds: float, books: dict) -> Set[Tuple[str, str, bool]]:
+            clock.advance_to(START + seconds)
+            for name, (bids, asks) in books.items():
+                rpc_client.handlers[f"orderbook.{name}.1.100"](json.dumps(orderbook_message(name, int((START + seconds) * 1000), bids, asks)), 100)
+            return _alert_keys(await monitor._determine_alerts(ticker_cache, listener, instruments_to_check))
+
+        decisions = [
+            await alerts_at(0, {CALL: THIN_WIDE_SIDES, PUT: TIGHT_SIDES}),
+            await alerts_at(30, {}),
+            # neither book changed, the call's breaches have just lasted long enough
+            await alerts_at(60, {}),
+            await alerts_at(75, {}),
+            await alerts_at(90, {CALL: WIDE_SIDES}),
+            await alerts_at(120, {CALL: TIGHT_SIDES}),
+        ]
+        await listener.close()
+        return decisions
+
+    decisions = asyncio.run(run())
+    assert decisions[:2] == [set(), set()]
+    # the deeper tier breaches on both spread and liquidity and alerts on both
+    assert decisions[2] == {(CALL, "spread 0", False), (CALL, "spread 1", False), (CALL, "liquidity 1", False)}
+    assert decisions[3] == set()
+    assert decisions[4] == {(CALL, "liquidity 1", True)}
+    assert decisions[5] == {(CALL, "spread 0", True), (CALL, "spread 1", True)}
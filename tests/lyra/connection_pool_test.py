@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+import lyra.connection_pool
+from lyra.connection_pool import ConnectionPool
+from tests.lyra.fakes import FakeRpcClient
+
+
+class FakeShardClient(FakeRpcClient):
+    def __init__(self, *args):
+        super().__init__()
+        self.is_closed = False
+        self.closed = None
+
+    async def connect(self):
+        self.closed = asyncio.get_running_loop().create_future()
+
+    async def close(self):
+        self.is_closed = True
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+    def drop(self):
+        self.is_closed = True
+        self.closed.set_result(ConnectionResetError("connection lost"))
+
+
+def test_subscriptions_are_sharded_and_retired_per_connection(monkeypatch):
+    monkeypatch.setattr(lyra.connection_pool, "RpcClient", FakeShardClient)
+
+    async def run():
+        connection_pool = ConnectionPool(max_connections=3, max_channels_per_connection=2)
+        await connection_pool.connect()
+        await connection_pool.subscribe(["a", "b", "c"], print)
+        await connection_pool.subscribe(["d"], print)
+        with pytest.raises(ValueError):
+            await connection_pool.subscribe(["e", "f", "g"], print)
+        shards_before_retiring = [sorted(client.handlers) for client in connection_pool._clients]
+        await connection_pool.unsubscribe(["a", "b"])
+        await connection_pool.subscribe(["e"], print)
+        return shards_before_retiring, [sorted(client.handlers) for client in connection_pool._clients]
+
+    shards_before_retiring, shards_after_retiring = asyncio.run(run())
+    # the subscription that didn't fit opened no connection
+    assert shards_before_retiring == [["a", "b"], ["c", "d"]]
+    assert shards_after_retiring == [["e"], ["c", "d"]]
+
+
+def test_lost_connections_are_replaced_and_resubscribed(monkeypatch):
+    monkeypatch.setattr(lyra.connection_pool, "RpcClient", FakeShardClient)
+
+    async def run():
+        connection_pool = ConnectionPool(max_connections=2, max_channels_per_connection=2)
+        await connection_pool.connect()
+        await connection_pool.subscribe(["a", "b", "c"], print, raw=True)
+        lost_client = connection_pool._clients[0]
+        lost_client.drop()
+        while connection_pool._clients[0] is lost_client:
+            await asyncio.sleep(0)
+        await connection_pool.close()
+        return [sorted(client.handlers) for client in connection_pool._clients]
+
+    assert asyncio.run(run()) == [["a", "b"], ["c"]]
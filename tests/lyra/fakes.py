@@ -0,0 +1,59 @@
+import asyncio
+import json
+from typing import Dict, List
+
+
+class FakeWebsocket:
+    """
+    In-memory stand-in for a websockets connection. Replies are queued by the test and handed out by recv.
+    """
+    def __init__(self, messages: List[Dict] | None = None):
+        self.sent: List[Dict] = []
+        self._messages = asyncio.Queue()
+        for message in messages or []:
+            self.push(message)
+
+    def push(self, message: Dict):
+        self._messages.put_nowait(json.dumps(message))
+
+    def drop(self):
+        """
+        Makes the next recv raise the way a lost connection does.
+        """
+        self._messages.put_nowait(ConnectionResetError("connection lost"))
+
+    async def send(self, message: str):
+        self.sent.append(json.loads(message))
+
+    async def recv(self) -> str:
+        message = await self._messages.get()
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    async def close(self):
+        pass
+
+
+class FakeRpcClient:
+    def __init__(self, tickers: Dict[str, Dict] | None = None):
+        self.calls: List[Dict] = []
+        self.handlers = {}
+        self._tickers = tickers or {}
+
+    async def call_many(self, method: str, params_list: List[Dict]) -> List[Dict]:
+        self.calls.extend(params_list)
+        return [{"result": self._tickers[params["instrument_name"]]} for params in params_list]
+
+    async def subscribe(self, channels: List[str], handler, raw: bool = False):
+        for channel in channels:
+            self.handlers[channel] = handler
+
+    async def unsubscribe(self, channels: List[str]):
+        for channel in channels:
+            self.handlers.pop(channel, None)
+
+
+def orderbook_message(instrument_name: str, timestamp: int, bids: List[List[str]] | None = None, asks: List[List[str]] | None = None) -> Dict:
+    return {"method": "subscription", "params": {"channel": f"orderbook.{instrument_name}.1.100", "data": {
+        "instrument_name": instrument_name, "timestamp": timestamp, "bids": bids or [["10", "1"]], "asks": asks or [["11", "1"]]}}}
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from lyra.instrument_table import InstrumentTable
+
+
+def test_table_parses_instruments_once_and_vectorizes_time_to_expiry():
+    expiry = 1711699200
+    table = InstrumentTable([
+        {"instrument_name": "ETH-20240329-3000-C", "option_details": {"strike": "3000", "expiry": expiry, "option_type": "C"}},
+        {"instrument_name": "ETH-20240329-2500-P", "option_details": {"strike": "2500.5", "expiry": expiry, "option_type": "P"}},
+    ])
+
+    assert len(table) == 2
+    assert table.index("ETH-20240329-2500-P") == 1
+    assert table.index("BTC-20240329-60000-C") is None
+    assert list(table.strikes) == [3000.0, 2500.5]
+    assert list(table.is_calls) == [True, False]
+    one_year_before_expiry_milli = (expiry - 365 * 24 * 60 * 60) * 1000
+    assert table.taus(one_year_before_expiry_milli, np.array([1, 0])) == pytest.approx([1.0, 1.0])
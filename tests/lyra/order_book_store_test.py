@@ -0,0 +1,25 @@
+import pytest
+
+from lyra.order_book_store import OrderBookStore
+from utils.depth_calculator import calculate_depth_price, calculate_depth_price_from_arrays
+
+
+def test_update_parses_levels_once_and_matches_depth_price():
+    store = OrderBookStore(["ETH-20240329-3000-C", "ETH-20240329-3000-P"], max_levels=3)
+    data = {
+        "instrument_name": "ETH-20240329-3000-C",
+        "timestamp": 1711670400000,
+        "bids": [["40", "8"], ["20", "200"]],
+        "asks": [["10", "5"], ["20", "200"], ["30", "1"], ["40", "1"]],
+    }
+
+    assert store.update(data) == 0
+    assert store.update({**data, "instrument_name": "BTC-20240329-60000-C"}) is None
+    assert store.has_book("ETH-20240329-3000-C")
+    assert not store.has_book("ETH-20240329-3000-P")
+    assert store.timestamp("ETH-20240329-3000-C") == 1711670400000
+    assert list(store.bids("ETH-20240329-3000-C")[0]) == [40.0, 20.0]
+    # levels past max_levels are dropped
+    assert list(store.asks("ETH-20240329-3000-C")[1]) == [5.0, 200.0, 1.0]
+    assert calculate_depth_price_from_arrays(10.0, *store.bids("ETH-20240329-3000-C")) == pytest.approx(calculate_depth_price(10.0, data["bids"]))
+    assert calculate_depth_price_from_arrays(10.0, *store.asks("ETH-20240329-3000-C")) == pytest.approx(calculate_depth_price(10.0, data["asks"]))
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pytest
+
+from lyra.push_decoder import OrderBookUpdate, decode_orderbook_push, push_channel
+from tests.lyra.fakes import orderbook_message
+
+
+def test_decodes_pushes_written_with_or_without_spaces():
+    message = orderbook_message("ETH-20240329-3000-C", 1711699200000, [["10.5", "1"], ["10", "2.25"]], [["11", "3"]])
+    for payload in (json.dumps(message), json.dumps(message, separators=(",", ":"))):
+        update = decode_orderbook_push(payload)
+        assert update.instrument_name == "ETH-20240329-3000-C"
+        assert update.timestamp == 1711699200000
+        assert update.bids.tolist() == [[10.5, 1.0], [10.0, 2.25]]
+        assert update.asks.tolist() == [[11.0, 3.0]]
+
+
+def test_decodes_bytes_and_empty_sides_like_parsed_data():
+    message = orderbook_message("ETH-20240329-3000-P", 2)
+    message["params"]["data"]["bids"] = []
+    payload = json.dumps(message).encode()
+    for update in (decode_orderbook_push(memoryview(payload)), OrderBookUpdate.from_data(message["params"]["data"])):
+        assert update.bids.shape == (0, 2)
+        assert np.array_equal(update.asks, [[11.0, 1.0]])
+
+
+def test_push_channel_ignores_replies():
+    assert push_channel(json.dumps(orderbook_message("ETH-20240329-3000-C", 1))) == "orderbook.ETH-20240329-3000-C.1.100"
+    assert push_channel(json.dumps({"id": 1, "result": {"channel": "orderbook.ETH-20240329-3000-C.1.100"}})) is None
+
+
+def test_malformed_pushes_raise_value_error():
+    with pytest.raises(ValueError):
+        decode_orderbook_push(json.dumps({"method": "subscription", "params": {"channel": "orderbook.x.1.10", "data": {"instrument_name": "x"}}}))
+    with pytest.raises(ValueError):
+        decode_orderbook_push(json.dumps(orderbook_message("ETH-20240329-3000-C", 1, [["10", "not a number"]])))
+
+
+def test_numbers_the_kernel_cannot_parse_exactly_match_float():
+    levels = [["1e3", "0.1234567890123456789"], [2500, 0.5]]
+    update = decode_orderbook_push(json.dumps(orderbook_message("ETH-20240329-3000-C", 1, levels, [["-1.25", "3"]])))
+    assert update.bids.tolist() == [[1000.0, 0.1234567890123456789], [2500.0, 0.5]]
+    assert update.asks.tolist() == [[-1.25, 3.0]]
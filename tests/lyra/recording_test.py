@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from lyra.recording import MAGIC, RECORD_HEADER, RPC_REPLY, SUBSCRIPTION_PUSH, Recorder, RecordingReader
+from lyra.replay_client import ReplayClient
+from lyra.subscription_listener import SubscriptionListener
+from tests.lyra.fakes import orderbook_message
+from utils.clock import VirtualClock
+
+
+def _ticker_reply(forward_price: str):
+    return {"id": 1, "result": {"option_pricing": {"forward_price": forward_price, "delta": "0.5", "iv": "0.6"}}}
+
+
+def test_recording_round_trips_and_replays_by_virtual_time(tmp_path):
+    path = str(tmp_path / "session.rec")
+    recorder = Recorder(path)
+    recorder.record_call(100.0, "public/get_ticker", {"instrument_name": "ETH-20240329-3000-C"}, _ticker_reply("3000"))
+    recorder.record_push(101.0, json.dumps(orderbook_message("ETH-20240329-3000-C", 101000)))
+    recorder.record_call(102.0, "public/get_ticker", {"instrument_name": "ETH-20240329-3000-C"}, _ticker_reply("3100"))
+    recorder.close()
+    # reopening appends without writing a second header
+    recorder = Recorder(path)
+    recorder.record_push(103.0, json.dumps(orderbook_message("ETH-20240329-3000-C", 103000)))
+    recorder.close()
+
+    reader = RecordingReader(path)
+    assert [(received_at, kind) for received_at, kind, _ in reader] == [(100.0, RPC_REPLY), (101.0, SUBSCRIPTION_PUSH), (102.0, RPC_REPLY), (103.0, SUBSCRIPTION_PUSH)]
+    reader.close()
+
+    async def replay():
+        clock = VirtualClock()
+        replay_client = ReplayClient(path, clock)
+        pushes = []
+        await replay_client.subscribe(["orderbook.ETH-20240329-3000-C.1.100"], lambda message, message_size: pushes.append((clock.time(), message["params"]["data"]["timestamp"])))
+        ticker_before = await replay_client.call("public/get_ticker", {"instrument_name": "ETH-20240329-3000-C"})
+        replay_client.start()
+        await replay_client.wait_until_finished()
+        ticker_after = await replay_client.call("public/get_ticker", {"instrument_name": "ETH-20240329-3000-C"})
+        await replay_client.close()
+        return pushes, ticker_before, ticker_after, replay_client.messages_replayed
+
+    pushes, ticker_before, ticker_after, messages_replayed = asyncio.run(replay())
+    assert pushes == [(101.0, 101000), (103.0, 103000)]
+    assert ticker_before["result"]["option_pricing"]["forward_price"] == "3000"
+    assert ticker_after["result"]["option_pricing"]["forward_price"] == "3100"
+    assert messages_replayed == 2
+
+
+def test_recorder_flushes_on_an_interval_and_on_close(tmp_path):
+    path = tmp_path / "session.rec"
+    recorder = Recorder(str(path), flush_interval_seconds=1.0)
+    message = json.dumps(orderbook_message("ETH-20240329-3000-C", 100000))
+    record_size = RECORD_HEADER.size + len(message)
+    recorder.record_push(100.0, message)
+    recorder.record_push(100.5, message)
+    size_within_interval = path.stat().st_size
+    recorder.record_push(101.0, message)
+    size_after_interval = path.stat().st_size
+    recorder.record_push(101.5, message)
+    recorder.close()
+
+    assert size_within_interval == len(MAGIC) + record_size
+    assert size_after_interval == len(MAGIC) + 3 * record_size
+    assert path.stat().st_size == len(MAGIC) + 4 * record_size
+
+
+def test_replayed_pushes_keep_reaching_a_listener_that_changes_depth(tmp_path):
+    path = str(tmp_path / "session.rec")
+    recorder = Recorder(path)
+    thin_side, deep_side = [["10", "0.1"]] * 10, [["10", "5"]] * 10
+    for timestamp in range(300):
+        side = thin_side if timestamp < 50 else deep_side
+        recorder.record_push(100.0 + timestamp, json.dumps(orderbook_message("ETH-20240329-3000-C", timestamp, side, side)))
+    recorder.close()
+
+    async def replay():
+        replay_client = ReplayClient(path, VirtualClock())
+        listener = SubscriptionListener(["ETH-20240329-3000-C"], replay_client, volume_to_cover=1.0)
+        await listener.subscribe()
+        replay_client.start()
+        await replay_client.wait_until_finished()
+        await asyncio.sleep(0)
+        depth, message_counts = listener.subscription_depth("ETH-20240329-3000-C"), listener.message_counts.tolist()
+        await listener.close()
+        await replay_client.close()
+        return depth, message_counts
+
+    depth, message_counts = asyncio.run(replay())
+    # widened to 20 on the thin books, then narrowed back down through 10 to 1 on the deep ones
+    assert depth == 1
+    assert message_counts == [300]
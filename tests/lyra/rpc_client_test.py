@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from lyra.rpc_client import RpcClient
+from tests.lyra.fakes import FakeWebsocket, orderbook_message
+
+
+def _connect(rpc_client: RpcClient, websocket: FakeWebsocket):
+    rpc_client._start_reader(websocket)
+
+
+def test_concurrent_calls_are_routed_by_id_and_pushes_by_channel():
+    async def run():
+        websocket = FakeWebsocket()
+        rpc_client = RpcClient(max_in_flight=8)
+        _connect(rpc_client, websocket)
+        pushes = []
+        websocket.push({"id": 1, "result": {"status": {"orderbook.ETH-20240329-3000-C.1.100": "ok"}}})
+        await rpc_client.subscribe(["orderbook.ETH-20240329-3000-C.1.100"], lambda message, message_size: pushes.append(message))
+        calls = asyncio.gather(*(rpc_client.call("public/get_ticker", {"instrument_name": name}) for name in ["a", "b", "c"]))
+        await asyncio.sleep(0)
+        # replies arrive out of order with a push interleaved
+        websocket.push({"id": 4, "result": "c"})
+        websocket.push(orderbook_message("ETH-20240329-3000-C", 1))
+        websocket.push({"id": 2, "result": "a"})
+        websocket.push({"id": 3, "result": "b"})
+        responses = await calls
+        await rpc_client.close()
+        return [response["result"] for response in responses], pushes, [message["id"] for message in websocket.sent]
+
+    results, pushes, sent_ids = asyncio.run(run())
+    assert results == ["a", "b", "c"]
+    assert len(pushes) == 1
+    assert sent_ids == [1, 2, 3, 4]
+
+
+def test_call_times_out_and_raises_on_errors():
+    async def run():
+        websocket = FakeWebsocket()
+        rpc_client = RpcClient()
+        _connect(rpc_client, websocket)
+        with pytest.raises(asyncio.TimeoutError):
+            await rpc_client.call("public/get_ticker", {}, timeout_seconds=.01)
+        websocket.push({"id": 2, "error": {"code": -32602}})
+        with pytest.raises(ValueError):
+            await rpc_client.call("public/get_ticker", {})
+        await rpc_client.close()
+
+    asyncio.run(run())
+
+
+def test_lost_connection_fails_pending_calls_and_resolves_closed():
+    async def run():
+        websocket = FakeWebsocket()
+        rpc_client = RpcClient()
+        _connect(rpc_client, websocket)
+        pending_call = asyncio.create_task(rpc_client.call("public/get_ticker", {}))
+        await asyncio.sleep(0)
+        websocket.drop()
+        with pytest.raises(ConnectionError):
+            await pending_call
+        closed_with = await rpc_client.closed
+        with pytest.raises(ConnectionError):
+            await rpc_client.call("public/get_ticker", {})
+        return closed_with, rpc_client.is_closed
+
+    closed_with, is_closed = asyncio.run(run())
+    assert isinstance(closed_with, ConnectionResetError)
+    assert is_closed
@@ -0,0 +1,25 @@
+import numpy as np
+
+from lyra.subscription_depth import SubscriptionDepth
+
+
+def test_widens_when_the_channel_is_full_but_the_volume_is_not_covered():
+    subscription_depth = SubscriptionDepth(1, volume_to_cover=5.0, initial_depth=10)
+    assert subscription_depth.observe(0, np.full(10, 0.1), np.full(10, 1.0)) == 20
+    assert subscription_depth.depth(0) == 20
+    # a book that ran out of levels is the whole book, so there is nothing deeper to subscribe to
+    assert subscription_depth.observe(0, np.full(3, 0.1), np.full(10, 1.0)) is None
+    assert subscription_depth.observe(0, np.full(20, 0.1), np.full(20, 1.0)) == 100
+    assert subscription_depth.observe(0, np.full(100, 0.01), np.full(100, 1.0)) is None
+
+
+def test_narrows_after_the_volume_is_covered_within_a_smaller_depth_for_long_enough():
+    subscription_depth = SubscriptionDepth(1, volume_to_cover=5.0, initial_depth=20, narrow_after=3)
+    covered_in_five_levels = np.full(20, 1.0)
+    assert subscription_depth.observe(0, covered_in_five_levels, covered_in_five_levels) is None
+    assert subscription_depth.observe(0, covered_in_five_levels, covered_in_five_levels) is None
+    # needing more levels than the smaller depth has starts the streak over
+    assert subscription_depth.observe(0, np.full(20, 0.4), covered_in_five_levels) is None
+    assert subscription_depth.observe(0, covered_in_five_levels, covered_in_five_levels) is None
+    assert subscription_depth.observe(0, covered_in_five_levels, covered_in_five_levels) is None
+    assert subscription_depth.observe(0, covered_in_five_levels, covered_in_five_levels) == 10
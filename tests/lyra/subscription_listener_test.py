@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from lyra.subscription_listener import SubscriptionListener
+from tests.lyra.fakes import FakeRpcClient, orderbook_message
+
+
+def test_wait_for_updates_returns_only_changed_instruments():
+    async def run():
+        rpc_client = FakeRpcClient()
+        listener = SubscriptionListener(["ETH-20240329-3000-C", "ETH-20240329-3000-P"], rpc_client)
+        await listener.subscribe()
+        handler = rpc_client.handlers["orderbook.ETH-20240329-3000-C.1.100"]
+        handler(json.dumps(orderbook_message("ETH-20240329-3000-C", 1)), 100)
+        handler(json.dumps(orderbook_message("ETH-20240329-3000-C", 2)), 100)
+        first_updates = await listener.wait_for_updates(timeout=1)
+        second_updates = await listener.wait_for_updates(timeout=.01)
+        await listener.close()
+        return first_updates, second_updates, listener.order_books.timestamp("ETH-20240329-3000-C"), rpc_client.handlers
+
+    first_updates, second_updates, timestamp, handlers = asyncio.run(run())
+    assert first_updates == {"ETH-20240329-3000-C"}
+    assert second_updates == set()
+    assert timestamp == 2
+    assert handlers == {}
+
+
+def test_thin_books_move_to_a_deeper_channel_and_pushes_are_counted():
+    async def run():
+        rpc_client = FakeRpcClient()
+        listener = SubscriptionListener(["ETH-20240329-3000-C"], rpc_client, volume_to_cover=5.0)
+        await listener.subscribe()
+        thin_side = [["10", "0.1"]] * 10
+        rpc_client.handlers["orderbook.ETH-20240329-3000-C.1.10"](json.dumps(orderbook_message("ETH-20240329-3000-C", 1, thin_side, thin_side)), 250)
+        await asyncio.sleep(0)
+        return set(rpc_client.handlers), listener.subscription_depth("ETH-20240329-3000-C"), listener.message_counts.tolist(), listener.message_bytes.tolist()
+
+    channels, depth, message_counts, message_bytes = asyncio.run(run())
+    assert channels == {"orderbook.ETH-20240329-3000-C.1.20"}
+    assert depth == 20
+    assert (message_counts, message_bytes) == ([1], [250])
+
+
+def test_close_leaves_both_channels_of_an_interrupted_resubscribe():
+    class SlowSubscribeRpcClient(FakeRpcClient):
+        async def subscribe(self, channels, handler, raw=False):
+            await super().subscribe(channels, handler, raw)
+            if self.handlers.keys() != set(channels):
+                # Lyra has the new channel, but its reply never arrives before close
+                await asyncio.Event().wait()
+
+    async def run():
+        rpc_client = SlowSubscribeRpcClient()
+        listener = SubscriptionListener(["ETH-20240329-3000-C"], rpc_client, volume_to_cover=5.0)
+        await listener.subscribe()
+        thin_side = [["10", "0.1"]] * 10
+        rpc_client.handlers["orderbook.ETH-20240329-3000-C.1.10"](json.dumps(orderbook_message("ETH-20240329-3000-C", 1, thin_side, thin_side)), 250)
+        await asyncio.sleep(0)
+        subscribed_before_close = set(rpc_client.handlers)
+        await listener.close()
+        return subscribed_before_close, rpc_client.handlers
+
+    subscribed_before_close, handlers = asyncio.run(run())
+    assert subscribed_before_close == {"orderbook.ETH-20240329-3000-C.1.10", "orderbook.ETH-20240329-3000-C.1.20"}
+    assert handlers == {}
@@ -0,0 +1,16 @@
+import asyncio
+
+from lyra.ticker_cache import TickerCache
+from tests.lyra.fakes import FakeRpcClient
+
+
+def test_refresh_stale_only_fetches_missing_tickers():
+    rpc_client = FakeRpcClient({"ETH-20240329-3000-P": {"option_pricing": {"forward_price": "3000", "delta": "0.4", "iv": "0.6"}}})
+    cache = TickerCache(["ETH-20240329-3000-C", "ETH-20240329-3000-P"], rpc_client)
+    cache.update("ETH-20240329-3000-C", {"forward_price": "3010.5", "delta": "0.55", "iv": "0.7"})
+    asyncio.run(cache.refresh_stale(["ETH-20240329-3000-C", "ETH-20240329-3000-P"]))
+
+    assert rpc_client.calls == [{"instrument_name": "ETH-20240329-3000-P"}]
+    assert cache.forward_price("ETH-20240329-3000-C") == 3010.5
+    assert cache.delta("ETH-20240329-3000-C") == 0.55
+    assert cache.mark_iv("ETH-20240329-3000-P") == 0.6
@@ -0,0 +1,140 @@
+import asyncio
+from typing import List
+
+import telegram.error
+
+from telegram_client.alert_dispatcher import Alert, AlertDispatcher
+from utils.clock import VirtualClock
+
+
+class FakeBot:
+    def __init__(self, failures: List[Exception] | None = None, send_seconds: float = 0.0):
+        self.messages: List[str] = []
+        self._failures = failures or []
+        self._send_seconds = send_seconds
+
+    async def send_message(self, message: str):
+        await asyncio.sleep(self._send_seconds)
+        if self._failures:
+            raise self._failures.pop(0)
+        self.messages.append(message)
+
+
+def _dispatcher(bot: FakeBot, clock: VirtualClock, **kwargs) -> AlertDispatcher:
+    return AlertDispatcher(bot, merge_window_seconds=.01, cooldown_seconds=60, min_send_interval_seconds=0, clock=clock, **kwargs)
+
+
+def test_alerts_are_merged_per_header_and_deduplicated():
+    async def run():
+        bot, clock = FakeBot(), VirtualClock(1000)
+        dispatcher = _dispatcher(bot, clock)
+        dispatcher.start()
+        dispatcher.submit(Alert("ETH-20240329-3000-C", "spread", "had a spread of 8%", "ETH header"))
+        dispatcher.submit(Alert("ETH-20240329-3000-C", "spread", "had a spread of 9%", "ETH header"))
+        dispatcher.submit(Alert("ETH-20240329-2500-P", "liquidity", "had low bid liquidity of 1", "ETH header"))
+        dispatcher.submit(Alert("BTC-20240329-60000-C", "spread", "had a spread of 7%", "BTC header"))
+        await asyncio.sleep(.05)
+        # still within the cooldown, so only the new alert type goes out
+        clock.advance_to(1030)
+        dispatcher.submit(Alert("ETH-20240329-3000-C", "spread", "had a spread of 10%", "ETH header"))
+        dispatcher.submit(Alert("ETH-20240329-3000-C", "liquidity", "had low ask liquidity of 2", "ETH header"))
+        await asyncio.sleep(.05)
+        # past the cooldown the spread alert is sent again
+        clock.advance_to(1061)
+        dispatcher.submit(Alert("ETH-20240329-3000-C", "spread", "had a spread of 11%", "ETH header"))
+        await dispatcher.close()
+        return bot.messages, dispatcher.suppressed
+
+    messages, suppressed = asyncio.run(run())
+    assert messages == [
+        "ETH header\nETH-20240329-2500-P: had low bid liquidity of 1\nETH-20240329-3000-C: had a spread of 9%",
+        "BTC header\nBTC-20240329-60000-C: had a spread of 7%",
+        "ETH header\nETH-20240329-3000-C: had low ask liquidity of 2",
+        "ETH header\nETH-20240329-3000-C: had a spread of 11%",
+    ]
+    assert suppressed == 1
+
+
+def test_submit_never_waits_on_a_slow_bot_and_drops_oldest_when_full():
+    async def run():
+        bot = FakeBot(send_seconds=.2)
+        dispatcher = _dispatcher(bot, VirtualClock(), max_queue_size=2)
+        dispatcher.start()
+        dispatcher.submit(Alert("a", "spread", "first", "header"))
+        await asyncio.sleep(.05)
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        for name in ["b", "c", "d"]:
+            dispatcher.submit(Alert(name, "spread", name, "header"))
+        submit_seconds = loop.time() - started_at
+        await dispatcher.close()
+        return bot.messages, dispatcher.dropped, submit_seconds
+
+    messages, dropped, submit_seconds = asyncio.run(run())
+    assert submit_seconds < .05
+    assert dropped == 1
+    assert messages[-1] == "header\nc: c\nd: d"
+
+
+def test_retry_after_is_respected():
+    async def run():
+        bot = FakeBot(failures=[telegram.error.RetryAfter(0), telegram.error.TimedOut()])
+        dispatcher = _dispatcher(bot, VirtualClock())
+        dispatcher.start()
+        dispatcher.submit(Alert("a", "spread", "first", "header"))
+        await asyncio.sleep(1.2)
+        await dispatcher.close()
+        return bot.messages, dispatcher.sent
+
+    messages, sent = asyncio.run(run())
+    assert messages == ["header\na: first"]
+    assert sent == 1
+
+
+def test_recovery_is_sent_only_for_sent_alerts_and_lifts_the_cooldown():
+    async def run():
+        bot, clock = FakeBot(), VirtualClock(1000)
+        dispatcher = _dispatcher(bot, clock)
+        dispatcher.start()
+        dispatcher.submit(Alert("a", "spread", "had a spread of 9%", "header"))
+        dispatcher.submit(Alert("b", "spread", "spread is back to 2%", "recovered", recovery=True))
+        await asyncio.sleep(.05)
+        dispatcher.submit(Alert("a", "spread", "spread is back to 2%", "recovered", recovery=True))
+        await asyncio.sleep(.05)
+        # within the cooldown, but the breach recovered so this is news again
+        dispatcher.submit(Alert("a", "spread", "had a spread of 8%", "header"))
+        await dispatcher.close()
+        return bot.messages
+
+    assert asyncio.run(run()) == ["header\na: had a spread of 9%", "recovered\na: spread is back to 2%", "header\na: had a spread of 8%"]
+
+
+def test_unretryable_errors_cost_one_attempt_and_never_stop_the_sender():
+    async def run():
+        bot = FakeBot(failures=[telegram.error.Forbidden("bot was kicked"), telegram.error.BadRequest("message is too long")])
+        dispatcher = _dispatcher(bot, VirtualClock())
+        dispatcher.start()
+        for name in ["a", "b", "c"]:
+            dispatcher.submit(Alert(name, "spread", name, "header"))
+            await asyncio.sleep(.05)
+        sender_alive = not dispatcher._sender_task.done()
+        await dispatcher.close()
+        return bot.messages, sender_alive
+
+    messages, sender_alive = asyncio.run(run())
+    assert sender_alive
+    assert messages == ["header\nc: c"]
+
+
+def test_close_sends_alerts_waiting_out_the_merge_window():
+    async def run():
+        bot = FakeBot()
+        dispatcher = AlertDispatcher(bot, merge_window_seconds=10, min_send_interval_seconds=0, clock=VirtualClock())
+        dispatcher.start()
+        dispatcher.submit(Alert("a", "spread", "first", "header"))
+        await asyncio.sleep(.01)
+        dispatcher.submit(Alert("b", "spread", "second", "header"))
+        await dispatcher.close()
+        return bot.messages
+
+    assert asyncio.run(run()) == ["header\na: first\nb: second"]
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from utils.black76 import b76_price, iv_from_b76_price, iv_from_b76_prices
+
+
+@pytest.mark.parametrize("sigma, strike, tau, is_call", [
+    # at the money call
+    (0.6, 3000.0, 0.1, True),
+    # out of the money put
+    (0.8, 2500.0, 0.05, False),
+    # deep out of the money call with long expiry
+    (1.2, 6000.0, 0.9, True),
+    # in the money put with short expiry
+    (0.4, 3200.0, 0.01, False),
+])
+def test_iv_from_b76_prices_matches_scalar_solver(sigma: float, strike: float, tau: float, is_call: bool):
+    forward_price = 3000.0
+    price = b76_price(sigma, strike, forward_price, tau, is_call)
+    actual = iv_from_b76_prices(np.array([price]), np.array([strike]), np.array([tau]), np.array([forward_price]), np.array([is_call]))
+    assert actual[0] == pytest.approx(sigma, abs=1e-6)
+    assert actual[0] == pytest.approx(iv_from_b76_price(price, strike, tau, forward_price, is_call), abs=1e-3)
+
+
+@pytest.mark.parametrize("price, strike, is_call, expected_iv", [
+    # call premium above the forward
+    (3001.0, 3000.0, True, 10.0),
+    # put premium above the strike
+    (2600.0, 2500.0, False, 10.0),
+    # call premium at intrinsic
+    (500.0, 2500.0, True, 0.0),
+    # worthless put
+    (0.0, 2500.0, False, 0.0),
+])
+def test_iv_from_b76_prices_edge_cases(price: float, strike: float, is_call: bool, expected_iv: float):
+    actual = iv_from_b76_prices(np.array([price]), np.array([strike]), np.array([0.1]), np.array([3000.0]), np.array([is_call]))
+    assert actual[0] == expected_iv
+    assert iv_from_b76_price(price, strike, 0.1, 3000.0, is_call) == expected_iv
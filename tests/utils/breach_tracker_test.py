@@ -0,0 +1,39 @@
+import numpy as np
+
+from utils.breach_tracker import BreachTracker
+
+
+def _update(tracker: BreachTracker, indices, breaching, timestamps):
+    alerts, recoveries = tracker.update(np.array(indices), np.array(breaching), np.array(timestamps, dtype=np.int64))
+    return alerts.tolist(), recoveries.tolist()
+
+
+def test_alerts_once_a_breach_persists_and_recovers_when_it_clears():
+    tracker = BreachTracker(3, persistence_millis=60000)
+    assert _update(tracker, [0, 1, 2], [True, True, False], [1000, 1000, 1000]) == ([], [])
+    assert _update(tracker, [0, 1], [True, False], [30000, 30000]) == ([], [])
+    # the breach start is kept across updates instead of resetting on a timer
+    assert _update(tracker, [0], [True], [61000]) == ([0], [])
+    # an alerted breach does not alert again
+    assert _update(tracker, [0], [True], [200000]) == ([], [])
+    assert _update(tracker, [0, 1], [False, False], [201000, 201000]) == ([], [0])
+    assert tracker.breach_started_at.tolist() == [-1, -1, -1]
+
+
+def test_due_alerts_breaches_whose_books_stopped_changing():
+    tracker = BreachTracker(2, persistence_millis=60000)
+    _update(tracker, [0, 1], [True, True], [1000, 20000])
+    assert tracker.due(60999).tolist() == []
+    assert tracker.due(61000).tolist() == [0]
+    assert tracker.due(90000).tolist() == [1]
+    assert tracker.due(500000).tolist() == []
+    assert _update(tracker, [1], [False], [500000]) == ([], [1])
+
+
+def test_reset_forgets_breaches_without_recovering():
+    tracker = BreachTracker(2, persistence_millis=60000)
+    _update(tracker, [0, 1], [True, True], [0, 0])
+    tracker.due(60000)
+    tracker.reset(np.array([True, False]))
+    assert tracker.alerted.tolist() == [False, True]
+    assert _update(tracker, [0, 1], [False, False], [70000, 70000]) == ([], [1])
@@ -1,11 +1,11 @@
 from typing import List
 
+import numpy as np
 import pytest
 
-from utils.depth_calculator import calculate_depth_price
+from utils.depth_calculator import calculate_depth_price, calculate_depth_price_from_arrays, calculate_depth_prices_from_arrays
 
-
-@pytest.mark.parametrize("depth, expected_price, expected_volume, orders", [
+DEPTH_PRICE_CASES = [
     # single order adds up to requested depth
     (10.0, 10.5, 10.0, [["10.5", "100"]]),
     # two different orders added up to requested depth
@@ -13,11 +13,37 @@ from utils.depth_calculator import calculate_depth_price
     # total volume does not add up to requested depth
     (10.0, 16.66, 6.0, [["10", "2"], ["20", "4"]]),
     # bid orders are taken in descending order
-    (10.0, 36.0, 10.0, [["40", "8"], ["20", "200"]])
-])
+    (10.0, 36.0, 10.0, [["40", "8"], ["20", "200"]]),
+]
+
+
+@pytest.mark.parametrize("depth, expected_price, expected_volume, orders", DEPTH_PRICE_CASES)
 def test_calculate_depth_price(depth: float, expected_price: float, expected_volume: float, orders: List[List[str]]):
     actual = calculate_depth_price(depth, orders)
     print("ACTUAL PRICE: ", actual)
     approx_price = pytest.approx(expected_price, .01)
     approx_volume = pytest.approx(expected_volume, .01)
     assert (approx_price, approx_volume) == actual
+
+
+@pytest.mark.parametrize("depth, expected_price, expected_volume, orders", DEPTH_PRICE_CASES + [
+    # empty side of the book
+    (10.0, 0.0, 0.0, []),
+    # depth lands exactly on a level boundary
+    (10.0, 15.0, 10.0, [["10", "5"], ["20", "5"], ["30", "5"]]),
+])
+def test_calculate_depth_price_from_arrays_matches_calculate_depth_price(depth: float, expected_price: float, expected_volume: float, orders: List[List[str]]):
+    parsed = np.array(orders, dtype=np.float64).reshape(-1, 2)
+    actual = calculate_depth_price_from_arrays(depth, parsed[:, 0], parsed[:, 1])
+    assert actual == pytest.approx(calculate_depth_price(depth, orders))
+    assert actual == (pytest.approx(expected_price, .01), pytest.approx(expected_volume, .01))
+
+
+def test_calculate_depth_prices_from_arrays_matches_one_depth_at_a_time():
+    depths = np.array([0.0, 2.0, 5.0, 10.0, 15.0, 40.0])
+    for orders in [case[3] for case in DEPTH_PRICE_CASES] + [[], [["10", "5"], ["20", "5"], ["30", "5"]]]:
+        parsed = np.array(orders, dtype=np.float64).reshape(-1, 2)
+        prices, volumes = calculate_depth_prices_from_arrays(depths, parsed[:, 0], parsed[:, 1])
+        expected = [calculate_depth_price(depth, orders) for depth in depths]
+        assert prices == pytest.approx([price for price, _ in expected])
+        assert volumes == pytest.approx([volume for _, volume in expected])
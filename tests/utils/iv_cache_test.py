@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from utils.black76 import b76_price
+from utils.iv_cache import IvCache
+
+
+def _solve(cache: IvCache, sigma: float, tau: float = 0.1):
+    price = b76_price(sigma, 3000.0, 3000.0, tau, True)
+    return cache.solve(np.array([0]), np.array([1]), np.array([price]), np.array([3000.0]), np.array([tau]), np.array([3000.0]), np.array([True]))[0]
+
+
+def test_repeated_prices_are_cache_hits_and_misses_are_warm_started():
+    cache = IvCache(instrument_count=1)
+    assert _solve(cache, 0.6) == pytest.approx(0.6, abs=1e-6)
+    cold_iterations = cache.iterations
+
+    assert _solve(cache, 0.6) == pytest.approx(0.6, abs=1e-6)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    assert _solve(cache, 0.601) == pytest.approx(0.601, abs=1e-6)
+    assert cache.misses == 2
+    assert cache.iterations - cold_iterations <= 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = IvCache(instrument_count=1, max_size=2)
+    for sigma in [0.5, 0.6, 0.5, 0.7]:
+        _solve(cache, sigma)
+
+    assert len(cache) == 2
+    _solve(cache, 0.5)
+    assert cache.hits == 2
+    _solve(cache, 0.6)
+    assert cache.misses == 4
@@ -0,0 +1,41 @@
+import asyncio
+
+import numpy as np
+
+from utils.metrics import NULL_METRICS, Metrics
+
+
+def test_histograms_and_gauges_are_served_as_prometheus_text():
+    metrics = Metrics()
+    histogram = metrics.histogram("lyra_rpc_round_trip_seconds", "Round trip")
+    histogram.observe(0.0003)
+    histogram.observe_many(np.array([0.002, 100.0]))
+    metrics.gauge("orderbooks_tracked", "Books", lambda: 7, {"currency": "ETH", "expiry": "20240329"})
+
+    async def scrape():
+        server = await metrics.serve(0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response.decode()
+
+    response = asyncio.run(scrape())
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert 'lyra_rpc_round_trip_seconds_bucket{le="0.0005"} 1' in response
+    assert 'lyra_rpc_round_trip_seconds_bucket{le="0.0025"} 2' in response
+    assert 'lyra_rpc_round_trip_seconds_bucket{le="+Inf"} 3' in response
+    assert "lyra_rpc_round_trip_seconds_count 3" in response
+    assert 'orderbooks_tracked{currency="ETH",expiry="20240329"} 7' in response
+
+    metrics.remove_gauges({"currency": "ETH", "expiry": "20240329"})
+    assert "orderbooks_tracked{" not in metrics.render()
+
+
+def test_disabled_metrics_do_nothing():
+    assert not NULL_METRICS.enabled
+    NULL_METRICS.histogram("unused", "Unused").observe(1.0)
+    NULL_METRICS.gauge("unused", "Unused", lambda: 1)
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from utils.black76 import b76_price, iv_from_b76_prices
+from utils.depth_calculator import calculate_depth_prices_from_arrays
+from utils.parallel_evaluation import evaluate_books
+
+
+def test_evaluate_books_matches_the_single_threaded_path():
+    rng = np.random.default_rng(0)
+    row_count, width, depths = 40, 6, np.array([0.5, 2.0, 5.0, 20.0])
+    strikes = np.linspace(2000.0, 4000.0, row_count)
+    is_calls = np.arange(row_count) % 2 == 0
+    taus, forward_prices = np.full(row_count, 0.1), np.full(row_count, 3000.0)
+    mids = np.array([b76_price(0.6, strike, 3000.0, 0.1, is_call) for strike, is_call in zip(strikes, is_calls)])
+    ticks = np.arange(1, width + 1) * 0.5
+    bid_prices, ask_prices = mids[:, None] - ticks, mids[:, None] + ticks
+    bid_volumes, ask_volumes = rng.uniform(0.0, 3.0, (row_count, width)), rng.uniform(0.0, 3.0, (row_count, width))
+    # ragged books, including an empty side
+    bid_counts, ask_counts = rng.integers(1, width + 1, row_count), rng.integers(1, width + 1, row_count)
+    ask_counts[3] = 0
+
+    depth_volumes, ivs, _ = evaluate_books(depths, bid_prices, bid_volumes, bid_counts, ask_prices, ask_volumes, ask_counts, strikes, taus, forward_prices, is_calls,
+                                           np.zeros((row_count, depths.size, 2)))
+
+    expected_prices, expected_volumes = np.zeros((row_count, depths.size, 2)), np.zeros((row_count, depths.size, 2))
+    for row in range(row_count):
+        expected_prices[row, :, 0], expected_volumes[row, :, 0] = calculate_depth_prices_from_arrays(depths, bid_prices[row, :bid_counts[row]], bid_volumes[row, :bid_counts[row]])
+        expected_prices[row, :, 1], expected_volumes[row, :, 1] = calculate_depth_prices_from_arrays(depths, ask_prices[row, :ask_counts[row]], ask_volumes[row, :ask_counts[row]])
+    assert depth_volumes == pytest.approx(expected_volumes)
+    for tier in range(depths.size):
+        for side in range(2):
+            expected_ivs = iv_from_b76_prices(expected_prices[:, tier, side], strikes, taus, forward_prices, is_calls)
+            assert ivs[:, tier, side] == pytest.approx(expected_ivs, abs=1e-7)
+    assert (ivs[3, :, 1] == 0.0).all()
+
+
+def test_importing_leaves_the_threading_layer_alone():
+    script = "import numba; layer = numba.config.THREADING_LAYER; import utils.parallel_evaluation; print(numba.config.THREADING_LAYER == layer)"
+    environment = {key: value for key, value in os.environ.items() if key != "NUMBA_THREADING_LAYER"}
+    environment["PYTHONPATH"] = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+    assert subprocess.run([sys.executable, "-c", script], env=environment, capture_output=True, text=True, check=True).stdout.strip() == "True"